@@ -1,9 +1,46 @@
-from flask import Flask, render_template_string, request, redirect, url_for, flash, jsonify, session
+from flask import Flask, render_template_string, request, redirect, url_for, flash, jsonify, session, g, Response, abort, send_file
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime
+from werkzeug.security import generate_password_hash, check_password_hash, safe_join
+import click
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from prometheus_client import Counter, Histogram, Gauge, CollectorRegistry, generate_latest, multiprocess, CONTENT_TYPE_LATEST
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from types import SimpleNamespace
+import atexit
+import base64
+import contextvars
+import cProfile
+import csv
+import fcntl
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import mimetypes
+import multiprocessing
 import os
+import queue
+import random
+import signal
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from simulator import generate_scores, verify_replays
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -16,6 +53,354 @@ login_manager.init_app(app)
 login_manager.login_view = 'login'
 login_manager.login_message = 'Please log in to access this page.'
 
+# Prometheus Metrics
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py) so every
+# worker writes its samples to shared mmap files and /metrics aggregates them all.
+REQUEST_COUNT = Counter('snake_http_requests_total', 'HTTP requests handled',
+                        ['endpoint', 'method', 'status'])
+REQUEST_LATENCY = Histogram('snake_http_request_duration_seconds', 'HTTP request latency',
+                            ['endpoint'],
+                            buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+REQUESTS_IN_PROGRESS = Gauge('snake_http_requests_in_progress', 'HTTP requests currently being handled',
+                             ['endpoint'], multiprocess_mode='livesum')
+DB_QUERY_LATENCY = Histogram('snake_db_query_duration_seconds', 'Database statement latency',
+                             ['operation'],
+                             buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1))
+
+UNTRACKED_ENDPOINTS = {'metrics', 'static', None}
+
+@app.before_request
+def start_request_metrics():
+    if request.endpoint in UNTRACKED_ENDPOINTS:
+        return
+    g.metrics_start = time.perf_counter()
+    REQUESTS_IN_PROGRESS.labels(request.endpoint).inc()
+
+@app.after_request
+def record_request_metrics(response):
+    if 'metrics_start' in g:
+        REQUEST_LATENCY.labels(request.endpoint).observe(time.perf_counter() - g.metrics_start)
+        REQUEST_COUNT.labels(request.endpoint, request.method, response.status_code).inc()
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'metrics_start' in g:
+        REQUESTS_IN_PROGRESS.labels(request.endpoint).dec()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_start'] = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop('query_start', time.perf_counter())
+    operation = statement.split(None, 1)[0].upper() if statement.strip() else 'UNKNOWN'
+    DB_QUERY_LATENCY.labels(operation).observe(elapsed)
+    profile = request_profile.get()
+    if profile is not None:
+        profile.queries.append((statement, elapsed))
+
+@app.route('/metrics')
+def metrics():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+
+# Request Profiling
+# Every SQL statement run on behalf of a request is counted and timed, and the
+# totals go out in a Server-Timing header. Requests slower than SLOW_REQUEST_MS
+# are logged as one JSON line with their most expensive statements. Requests
+# that carry PROFILE_TOKEN in the X-Profile-Token header run under cProfile (a
+# PROFILE_SAMPLE_RATE share of them) and the stats are dumped to PROFILE_DIR.
+# QUERY_BUDGET_MODE=strict answers 500 when an endpoint runs more statements
+# than its QUERY_BUDGETS entry; tests/test_query_budgets.py drives the main
+# pages that way.
+SERVER_TIMING = os.environ.get('SERVER_TIMING', 'true').lower() == 'true'
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', '500'))
+SLOW_REQUEST_STATEMENTS = int(os.environ.get('SLOW_REQUEST_STATEMENTS', '5'))
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '1'))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'snake-profiles'))
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'off')  # off, warn or strict
+
+# Statements allowed per request with a cold worker (empty identity cache,
+# leaderboard not loaded yet), SCORE_WRITE_MODE=sync and SCORE_SHARDS=1
+QUERY_BUDGETS = {
+    'home': 1,
+    'register': 3,
+    'login': 2,
+    'logout': 1,
+    'dashboard': 3,
+    'save_score': 5,
+    'score_history': 2,
+    'score_analytics_view': 3,
+    'score_stats': 1,
+    'leaderboard_page': 5,
+    # Two more when the player is below the in-memory top LEADERBOARD_SIZE
+    'leaderboard_me': 7,
+}
+
+# Fan-out threads and background writers have no request, so they record nothing
+request_profile = contextvars.ContextVar('request_profile', default=None)
+
+class RequestProfile:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = []
+        self.profiler = None
+
+    def top_statements(self, limit):
+        totals = {}
+        for statement, elapsed in self.queries:
+            count, total = totals.get(statement, (0, 0.0))
+            totals[statement] = (count + 1, total + elapsed)
+        ranked = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [{'statement': ' '.join(statement.split())[:500], 'count': count, 'ms': round(total * 1000, 2)}
+                for statement, (count, total) in ranked]
+
+def wants_cprofile():
+    token = request.headers.get('X-Profile-Token')
+    return (PROFILE_TOKEN is not None and token is not None
+            and hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+            and random.random() < PROFILE_SAMPLE_RATE)
+
+def dump_cprofile(profiler):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f'{request.endpoint}-{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-'
+                                     f'{threading.get_ident()}.prof')
+    profiler.dump_stats(path)
+    app.logger.info('Wrote profile of %s %s to %s', request.method, request.path, path)
+
+@app.before_request
+def start_request_profile():
+    if request.endpoint in UNTRACKED_ENDPOINTS:
+        return
+    profile = RequestProfile()
+    g.request_profile_token = request_profile.set(profile)
+    if wants_cprofile():
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread
+            return
+        profile.profiler = profiler
+
+@app.after_request
+def finish_request_profile(response):
+    profile = request_profile.get()
+    if profile is None:
+        return response
+    if profile.profiler is not None:
+        profile.profiler.disable()
+        dump_cprofile(profile.profiler)
+        profile.profiler = None
+    budget = QUERY_BUDGETS.get(request.endpoint)
+    if QUERY_BUDGET_MODE != 'off' and budget is not None and len(profile.queries) > budget:
+        message = f'{request.endpoint} ran {len(profile.queries)} SQL statements, budget is {budget}'
+        if QUERY_BUDGET_MODE == 'strict':
+            app.logger.error('%s: %s', message, json.dumps(profile.top_statements(len(profile.queries))))
+            response = Response(message, status=500, mimetype='text/plain')
+        else:
+            app.logger.warning(message)
+    elapsed_ms = (time.perf_counter() - profile.start) * 1000
+    db_ms = sum(elapsed for _, elapsed in profile.queries) * 1000
+    if SERVER_TIMING:
+        response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{len(profile.queries)} queries", '
+                                              f'app;dur={elapsed_ms:.1f}')
+    if elapsed_ms >= SLOW_REQUEST_MS:
+        app.logger.warning(json.dumps({
+            'event': 'slow_request', 'endpoint': request.endpoint, 'method': request.method,
+            'path': request.path, 'status': response.status_code, 'duration_ms': round(elapsed_ms, 1),
+            'db_ms': round(db_ms, 1), 'queries': len(profile.queries),
+            'top_statements': profile.top_statements(SLOW_REQUEST_STATEMENTS),
+        }))
+    return response
+
+@app.teardown_request
+def reset_request_profile(exc):
+    if 'request_profile_token' in g:
+        profile = request_profile.get()
+        if profile is not None and profile.profiler is not None:
+            profile.profiler.disable()
+        request_profile.reset(g.pop('request_profile_token'))
+
+# Storage Profile
+# PRAGMAs applied to every new SQLite connection. 'wal' lets readers run
+# alongside the single writer and waits on locks instead of failing with
+# "database is locked"; 'legacy' keeps SQLite's rollback-journal defaults.
+SQLITE_PROFILES = {
+    'legacy': {},
+    'wal': {
+        'journal_mode': 'WAL',
+        'busy_timeout': 5000,
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -16000,
+    },
+}
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'wal')
+
+def apply_sqlite_profile(dbapi_connection, profile):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma, value in SQLITE_PROFILES[profile].items():
+            try:
+                cursor.execute(f'PRAGMA {pragma} = {value}')
+            except sqlite3.OperationalError:
+                # Read-only connections cannot switch journal mode; the writer already has
+                if pragma != 'journal_mode':
+                    raise
+    finally:
+        cursor.close()
+
+@event.listens_for(Engine, 'connect')
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        apply_sqlite_profile(dbapi_connection, SQLITE_PROFILE)
+
+# Read-only queries (session loading, dashboard, history, leaderboards) use their
+# own engine and pool so they never queue behind a connection holding the write
+# lock. READ_DATABASE_URL can point at a replica; for SQLite the same file is
+# opened with mode=ro.
+storage = {'read_engine': None, 'shard_engines': None}
+
+def get_read_engine():
+    if storage['read_engine'] is None:
+        url = os.environ.get('READ_DATABASE_URL')
+        if url is None and db.engine.url.get_backend_name() == 'sqlite' and db.engine.url.database:
+            url = f'sqlite:///file:{db.engine.url.database}?mode=ro&uri=true'
+        storage['read_engine'] = create_engine(url) if url else db.engine
+    return storage['read_engine']
+
+def read_execute(statement):
+    return db.session.execute(statement, bind_arguments={'bind': get_read_engine()})
+
+# Password Hashing
+# Hashing is deliberately CPU-heavy. It runs in a small per-worker process pool
+# at lower priority. Admission is a pod-wide bounded queue: HASH_QUEUE_SIZE lock
+# files shared by all workers, taken without waiting, so a login that finds the
+# queue full is answered 503 at once instead of tying up a worker that serves
+# the game. Admitted requests then take one of HASH_CONCURRENCY run slots, which
+# caps the CPU spent on hashing; a sync or gthread worker still waits for its
+# own hash, but never behind more than HASH_QUEUE_SIZE - 1 others.
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', '16'))
+HASH_CONCURRENCY = int(os.environ.get('HASH_CONCURRENCY', '2'))
+HASH_QUEUE_SIZE = int(os.environ.get('HASH_QUEUE_SIZE', '8'))
+HASH_SLOT_DIR = os.environ.get('HASH_SLOT_DIR', '/tmp/snake-hash-slots')
+HASH_NICE = int(os.environ.get('HASH_NICE', '5'))
+
+HASH_LATENCY = Histogram('snake_password_hash_duration_seconds', 'Password hash/verify latency', ['operation'],
+                         buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+HASH_QUEUE_DEPTH = Gauge('snake_password_hash_waiting', 'Requests waiting for a hashing slot',
+                         multiprocess_mode='livesum')
+HASH_REJECTED = Counter('snake_password_hash_rejected_total', 'Requests turned away because hashing was saturated')
+
+class PasswordHashBusy(Exception):
+    pass
+
+def process_pool_context():
+    # Pool processes come from multiprocessing's forkserver, a single-threaded
+    # process, instead of being forked from a worker that is already running
+    # writer, compactor or request threads: a lock one of those held at fork
+    # time (logging, SQLAlchemy's pool) would stay locked forever in the child.
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(['werkzeug.security', 'simulator'])
+    return context
+
+@lru_cache(maxsize=1)
+def password_hash_prefix():
+    # Werkzeug stores the method with its defaults filled in (pbkdf2:sha256 gains
+    # werkzeug's default iteration count), so learn the stored form from one
+    # reference hash, made the first time a login needs it
+    return generate_password_hash('', PASSWORD_HASH_METHOD, PASSWORD_SALT_LENGTH).split('$', 1)[0]
+
+def take_slot(name, count):
+    # Returns the descriptor of the first free lock file name-0..count-1, or None
+    for index in range(count):
+        fd = os.open(os.path.join(HASH_SLOT_DIR, f'{name}-{index}'), os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            continue
+        return fd
+    return None
+
+def release_slot(fd):
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+class PasswordHasher:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pool = None
+        self.pid = None
+
+    def executor(self):
+        with self.lock:
+            if self.pool is None or self.pid != os.getpid():
+                self.pool = ProcessPoolExecutor(max_workers=1, mp_context=process_pool_context(),
+                                                initializer=os.nice, initargs=(HASH_NICE,))
+                self.pid = os.getpid()
+            return self.pool
+
+    def discard(self, pool):
+        # Only drop the pool that broke; another thread may already have replaced it
+        with self.lock:
+            if self.pool is pool:
+                self.pool = None
+
+    @contextmanager
+    def slot(self):
+        os.makedirs(HASH_SLOT_DIR, exist_ok=True)
+        place = take_slot('queue', HASH_QUEUE_SIZE)
+        if place is None:
+            HASH_REJECTED.inc()
+            raise PasswordHashBusy()
+        running = None
+        try:
+            HASH_QUEUE_DEPTH.inc()
+            try:
+                while (running := take_slot('slot', HASH_CONCURRENCY)) is None:
+                    time.sleep(0.005)
+            finally:
+                HASH_QUEUE_DEPTH.dec()
+            yield
+        finally:
+            if running is not None:
+                release_slot(running)
+            release_slot(place)
+
+    def run(self, operation, function, *args):
+        with self.slot():
+            start = time.perf_counter()
+            pool = self.executor()
+            try:
+                result = pool.submit(function, *args).result()
+            except BrokenProcessPool:
+                self.discard(pool)
+                raise
+            HASH_LATENCY.labels(operation).observe(time.perf_counter() - start)
+            return result
+
+    def hash(self, password):
+        return self.run('hash', generate_password_hash, password, PASSWORD_HASH_METHOD, PASSWORD_SALT_LENGTH)
+
+    def verify(self, password_hash, password):
+        return self.run('verify', check_password_hash, password_hash, password)
+
+password_hasher = PasswordHasher()
+
+@app.errorhandler(PasswordHashBusy)
+def password_hash_busy(e):
+    return 'Too many sign-ins right now, please try again in a moment.', 503, {
+        'Retry-After': '2', 'Content-Type': 'text/plain; charset=utf-8'}
+
 # Database Models
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -26,10 +411,15 @@ class User(UserMixin, db.Model):
     scores = db.relationship('Score', backref='user', lazy=True, cascade='all, delete-orphan')
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def needs_rehash(self):
+        method, _, rest = self.password_hash.partition('$')
+        salt = rest.partition('$')[0]
+        return method != password_hash_prefix() or len(salt) != PASSWORD_SALT_LENGTH
 
 class Score(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -41,10 +431,1347 @@ class Score(db.Model):
     canvas_size = db.Column(db.Integer, nullable=False)
     grid_size = db.Column(db.Integer, nullable=False)
     played_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # True/False once the submitted replay has been re-simulated; NULL while
+    # pending or when the game was saved without a replay
+    verified = db.Column(db.Boolean)
+
+class ScoreReplay(db.Model):
+    # Kept apart from score so history and leaderboard scans never read the blobs
+    score_id = db.Column(db.Integer, db.ForeignKey('score.id'), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+
+class ScoreRollup(db.Model):
+    # Scores older than SCORE_RETENTION_DAYS, aggregated per user, day and game settings
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    grid_size = db.Column(db.Integer, primary_key=True)
+    canvas_size = db.Column(db.Integer, primary_key=True)
+    game_speed = db.Column(db.Integer, primary_key=True)
+    games = db.Column(db.Integer, nullable=False)
+    score_sum = db.Column(db.BigInteger, nullable=False)
+    best_score = db.Column(db.Integer, nullable=False)
+    min_score = db.Column(db.Integer, nullable=False)
+    verified_games = db.Column(db.Integer, nullable=False, default=0)
+    rejected_games = db.Column(db.Integer, nullable=False, default=0)
+    last_played_at = db.Column(db.DateTime)
+
+class UserStats(db.Model):
+    # Running per-user aggregates, updated in the same transaction as each score insert
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    games_played = db.Column(db.Integer, nullable=False, default=0)
+    best_score = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.BigInteger, nullable=False, default=0)
+    last_played_at = db.Column(db.DateTime)
+
+    @property
+    def average_score(self):
+        return round(self.score_sum / self.games_played, 1) if self.games_played else 0
+
+# Covering indexes for the per-user history and best-score queries
+db.Index('ix_score_user_played_at', Score.user_id, Score.played_at.desc())
+db.Index('ix_score_user_score', Score.user_id, Score.score.desc())
+# Time-window scans (daily/weekly leaderboards)
+db.Index('ix_score_played_at', Score.played_at)
+
+# Score Shards
+# With SCORE_SHARDS > 1, each user's Score and UserStats rows live in one of N
+# SQLite files picked by a hash of user_id, so writes for different users take
+# different file locks. Users stay in the main database. Per-user queries go
+# to one shard; cross-user queries run on every shard in parallel and merge.
+SCORE_SHARDS = int(os.environ.get('SCORE_SHARDS', '1'))
+
+def get_shard_engines():
+    if storage.get('shard_engines') is None:
+        template = os.environ.get('SCORE_SHARD_URL')
+        if template is None:
+            data_dir = os.path.dirname(db.engine.url.database)
+            template = 'sqlite:///' + os.path.join(data_dir, 'scores_{shard}.db')
+        # Shard tables come from the schema migrations, like the main database's
+        storage['shard_engines'] = [create_engine(template.format(shard=shard)) for shard in range(SCORE_SHARDS)]
+    return storage['shard_engines']
+
+def shard_index(user_id):
+    return zlib.crc32(str(user_id).encode()) % SCORE_SHARDS
+
+def score_engines():
+    # Engines that hold Score rows, for writes and maintenance
+    return get_shard_engines() if SCORE_SHARDS > 1 else [db.engine]
+
+def score_engine_for(user_id):
+    return get_shard_engines()[shard_index(user_id)] if SCORE_SHARDS > 1 else db.engine
+
+def score_read_execute(statement, user_id):
+    bind = score_engine_for(user_id) if SCORE_SHARDS > 1 else get_read_engine()
+    return db.session.execute(statement, bind_arguments={'bind': bind})
+
+def fan_out(query):
+    # Runs query(shard_index, connection) on every shard and returns the results in shard order
+    engines = get_shard_engines() if SCORE_SHARDS > 1 else [get_read_engine()]
+    profile = request_profile.get()
+
+    def run(index):
+        # Pool threads start without the request's context; count their statements too
+        request_profile.set(profile)
+        with engines[index].connect() as conn:
+            return query(index, conn)
+
+    if len(engines) == 1:
+        return [run(0)]
+    with ThreadPoolExecutor(max_workers=len(engines)) as pool:
+        return list(pool.map(run, range(len(engines))))
+
+# Session Identity Cache
+# load_user runs on every authenticated request. It only needs to know who the
+# session belongs to, so it loads a lightweight SessionUser (no password hash)
+# and keeps it in a per-worker LRU with a TTL. Changes made through the ORM
+# invalidate this worker's entry immediately; other workers see them once the
+# TTL expires.
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '60'))
+
+USER_CACHE_REQUESTS = Counter('snake_user_cache_requests_total', 'Session user lookups', ['result'])
+
+class SessionUser(UserMixin):
+    def __init__(self, id, username, email):
+        self.id = id
+        self.username = username
+        self.email = email
+
+class IdentityCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(user_id)
+                self.hits += 1
+                USER_CACHE_REQUESTS.labels('hit').inc()
+                return entry[1]
+            self.entries.pop(user_id, None)
+            self.misses += 1
+            USER_CACHE_REQUESTS.labels('miss').inc()
+            return None
+
+    def put(self, user_id, user):
+        with self.lock:
+            self.entries[user_id] = (time.monotonic() + self.ttl, user)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+identity_cache = IdentityCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, target):
+    identity_cache.invalidate(target.id)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    user = identity_cache.get(user_id)
+    if user is None:
+        row = read_execute(db.select(User.id, User.username, User.email).where(User.id == user_id)).first()
+        if row is None:
+            return None
+        user = SessionUser(row.id, row.username, row.email)
+        identity_cache.put(user_id, user)
+    return user
+
+# Score Ingestion
+# SCORE_WRITE_MODE=sync commits every score inside the request. In batched mode
+# scores go onto a bounded per-worker queue and a background thread commits them
+# in groups, so a burst of submissions costs one transaction per batch.
+SCORE_WRITE_MODE = os.environ.get('SCORE_WRITE_MODE', 'sync')
+SCORE_QUEUE_SIZE = int(os.environ.get('SCORE_QUEUE_SIZE', '1000'))
+SCORE_BATCH_SIZE = int(os.environ.get('SCORE_BATCH_SIZE', '100'))
+SCORE_BATCH_DELAY = float(os.environ.get('SCORE_BATCH_DELAY_MS', '50')) / 1000
+
+SCORE_QUEUE_DEPTH = Gauge('snake_score_queue_depth', 'Scores waiting to be committed',
+                          multiprocess_mode='livesum')
+SCORE_BATCH_ROWS = Histogram('snake_score_batch_rows', 'Scores committed per transaction',
+                             buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500))
+
+def score_row_error(row):
+    """Why a submitted game cannot be stored, or None when it is plausible."""
+    if row['grid_size'] <= 0 or row['canvas_size'] < row['grid_size'] or row['game_speed'] <= 0:
+        return 'Invalid game settings'
+    # A point per food, and the snake can at most fill the board
+    cells = (row['canvas_size'] // row['grid_size']) ** 2
+    for name in ('score', 'snake_length', 'foods_eaten'):
+        if not 0 <= row[name] <= cells:
+            return f'Invalid {name}'
+    return None
+
+def apply_score_stats(conn, rows):
+    totals = {}
+    for row in rows:
+        games, best, total, last = totals.get(row['user_id'], (0, None, 0, None))
+        totals[row['user_id']] = (games + 1,
+                                  row['score'] if best is None else max(best, row['score']),
+                                  total + row['score'],
+                                  row['played_at'] if last is None else max(last, row['played_at']))
+    for user_id, (games, best, total, last) in totals.items():
+        updated = conn.execute(
+            db.update(UserStats)
+            .where(UserStats.user_id == user_id)
+            .values(games_played=UserStats.games_played + games,
+                    best_score=db.case((UserStats.best_score < best, best), else_=UserStats.best_score),
+                    score_sum=UserStats.score_sum + total,
+                    last_played_at=db.case((UserStats.last_played_at < last, last),
+                                           (UserStats.last_played_at.is_(None), last),
+                                           else_=UserStats.last_played_at))
+        )
+        if updated.rowcount == 0:
+            conn.execute(db.insert(UserStats).values(user_id=user_id, games_played=games, best_score=best,
+                                                     score_sum=total, last_played_at=last))
+
+def persist_scores(rows):
+    by_engine = {}
+    for row in rows:
+        by_engine.setdefault(score_engine_for(row['user_id']), []).append(row)
+    # One transaction per shard; unsharded, that is a single transaction
+    for engine, engine_rows in by_engine.items():
+        replays = [row.get('replay') for row in engine_rows]
+        jobs = []
+        with engine.begin() as conn:
+            if any(replays):
+                # Rows are left untouched so ScoreWriter can retry them one by one
+                score_rows = [{key: value for key, value in row.items() if key != 'replay'} for row in engine_rows]
+                score_ids = conn.execute(db.insert(Score).returning(Score.id, sort_by_parameter_order=True),
+                                         score_rows).scalars().all()
+                jobs = [(score_id, replay, {name: row[name] for name in REPLAY_CLAIMS})
+                        for score_id, replay, row in zip(score_ids, replays, engine_rows) if replay]
+                conn.execute(db.insert(ScoreReplay), [{'score_id': job[0], 'data': job[1]} for job in jobs])
+            else:
+                conn.execute(db.insert(Score), engine_rows)
+            apply_score_stats(conn, engine_rows)
+        SCORE_BATCH_ROWS.observe(len(engine_rows))
+        if jobs:
+            replay_verifier.submit(engine, jobs)
+    leaderboard.mark_stale()
+    live_feed.notify()
+    score_analytics.mark_stale({row['user_id'] for row in rows})
+
+class ScoreWriter:
+    STOP = object()
+
+    def __init__(self, max_queue, batch_size, max_delay):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+
+    def submit(self, row):
+        # Raises queue.Full when the writer cannot keep up
+        self.ensure_started()
+        self.queue.put_nowait(row)
+        SCORE_QUEUE_DEPTH.inc()
+
+    def ensure_started(self):
+        # Threads do not survive fork, so start one lazily in each worker
+        with self.lock:
+            if self.thread is None or self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.thread = threading.Thread(target=self.run, name='score-writer', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            row = self.queue.get()
+            if row is self.STOP:
+                break
+            batch = [row]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is self.STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            self.write(batch)
+
+    def write(self, batch):
+        SCORE_QUEUE_DEPTH.dec(len(batch))
+        with app.app_context():
+            try:
+                persist_scores(batch)
+                return
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Batch insert of %d scores failed, retrying one by one', len(batch))
+            # Isolate the bad row instead of dropping the whole batch
+            for row in batch:
+                try:
+                    persist_scores([row])
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Dropping score for user %s', row['user_id'])
+
+    def flush(self, timeout=10):
+        with self.lock:
+            if self.thread is None or self.pid != os.getpid():
+                return
+            thread, self.thread = self.thread, None
+        self.queue.put(self.STOP, timeout=timeout)
+        thread.join(timeout)
+
+score_writer = ScoreWriter(SCORE_QUEUE_SIZE, SCORE_BATCH_SIZE, SCORE_BATCH_DELAY)
+# gunicorn's worker_exit hook flushes explicitly; atexit covers `python app.py`
+atexit.register(score_writer.flush)
+
+# Replay Verification
+# Clients send a compact replay of each game (see simulator.py for the format).
+# It is stored next to the score, and the game is re-simulated in a per-worker
+# process pool after the score is committed, so save latency does not depend
+# on game length. The result lands in score.verified. Batches beyond
+# REPLAY_MAX_PENDING are left unverified for `flask verify-replays` instead
+# of queueing without bound.
+REPLAY_MAX_BYTES = int(os.environ.get('REPLAY_MAX_BYTES', '16384'))
+REPLAY_VERIFY_WORKERS = int(os.environ.get('REPLAY_VERIFY_WORKERS', '1'))
+REPLAY_MAX_PENDING = int(os.environ.get('REPLAY_MAX_PENDING', '1000'))
+REPLAY_NICE = int(os.environ.get('REPLAY_NICE', '10'))
+# Submitted values a replay has to reproduce
+REPLAY_CLAIMS = ('score', 'snake_length', 'foods_eaten', 'game_speed', 'canvas_size', 'grid_size')
+
+REPLAY_VERIFICATIONS = Counter('snake_replay_verifications_total', 'Replays checked, by outcome', ['result'])
+REPLAY_VERIFY_LATENCY = Histogram('snake_replay_verify_duration_seconds', 'Time from submit to verdict per batch',
+                                  buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+REPLAY_PENDING = Gauge('snake_replay_pending', 'Replays waiting for verification', multiprocess_mode='livesum')
+
+def record_verification(engine, results):
+    with engine.begin() as conn:
+        conn.execute(db.update(Score).where(Score.id == db.bindparam('score_id'))
+                     .values(verified=db.bindparam('ok')),
+                     [{'score_id': score_id, 'ok': ok} for score_id, ok in results])
+    for _, ok in results:
+        REPLAY_VERIFICATIONS.labels('verified' if ok else 'rejected').inc()
+
+class ReplayVerifier:
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.pool = None
+        self.pid = None
+
+    def executor(self):
+        with self.lock:
+            if self.pool is None or self.pid != os.getpid():
+                # Started from the forkserver like PasswordHasher's; submit() runs on
+                # the ScoreWriter thread in batched mode, so forking here is unsafe
+                self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=process_pool_context(),
+                                                initializer=os.nice, initargs=(REPLAY_NICE,))
+                self.pid = os.getpid()
+            return self.pool
+
+    def discard(self, pool):
+        with self.lock:
+            if self.pool is pool:
+                self.pool = None
+
+    def submit(self, engine, jobs):
+        with self.lock:
+            if self.pending + len(jobs) > self.max_pending:
+                REPLAY_VERIFICATIONS.labels('skipped').inc(len(jobs))
+                return
+            self.pending += len(jobs)
+        REPLAY_PENDING.inc(len(jobs))
+        started = time.perf_counter()
+        pool = self.executor()
+        try:
+            future = pool.submit(verify_replays, jobs)
+        except BrokenProcessPool:
+            self.discard(pool)
+            self.done(len(jobs))
+            return
+        future.add_done_callback(lambda future: self.finished(engine, jobs, started, pool, future))
+
+    def finished(self, engine, jobs, started, pool, future):
+        self.done(len(jobs))
+        try:
+            results = future.result()
+            REPLAY_VERIFY_LATENCY.observe(time.perf_counter() - started)
+            record_verification(engine, results)
+        except BrokenProcessPool:
+            self.discard(pool)
+            app.logger.error('Replay verifier pool died; %d scores left unverified', len(jobs))
+        except Exception:
+            app.logger.exception('Could not record verification of %d scores', len(jobs))
+
+    def done(self, count):
+        with self.lock:
+            self.pending -= count
+        REPLAY_PENDING.dec(count)
+
+replay_verifier = ReplayVerifier(REPLAY_VERIFY_WORKERS, REPLAY_MAX_PENDING)
+
+# Score Retention
+# With SCORE_RETENTION_DAYS set, scores from before that many whole days ago are
+# folded into score_rollup (one row per user, day and game settings) and deleted
+# together with their replays, so the database stops growing with every game.
+# user_stats is left alone, so dashboard totals, best and average stay exact, and
+# leaderboards read rollups next to raw scores. Compacted rows can be kept as
+# gzipped NDJSON in SCORE_ARCHIVE_DIR for auditing; they are already counted in
+# the rollups and user_stats, so they are not meant to be imported again.
+# Every worker runs a compaction thread; a lock file next to the database lets
+# one at a time (across replicas on the volume) do the work, in small
+# transactions so score saves are not held up.
+SCORE_RETENTION_DAYS = int(os.environ.get('SCORE_RETENTION_DAYS', '0'))
+SCORE_ARCHIVE_DIR = os.environ.get('SCORE_ARCHIVE_DIR')
+SCORE_COMPACT_INTERVAL = float(os.environ.get('SCORE_COMPACT_INTERVAL', '3600'))
+SCORE_COMPACT_BATCH = int(os.environ.get('SCORE_COMPACT_BATCH', '2000'))
+SCORE_COMPACT_RETRIES = 8
+
+SCORES_COMPACTED = Counter('snake_scores_compacted_total', 'Raw scores folded into daily rollups')
+
+def retention_cutoff(days, now=None):
+    now = now or datetime.utcnow()
+    return datetime(now.year, now.month, now.day) - timedelta(days=days)
+
+def archive_scores(rows):
+    os.makedirs(SCORE_ARCHIVE_DIR, exist_ok=True)
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(row.played_at.strftime('%Y-%m'), []).append(row)
+    for month, month_rows in by_month.items():
+        # Appending adds a gzip member; readers see one continuous file
+        with gzip.open(os.path.join(SCORE_ARCHIVE_DIR, f'scores-{month}.ndjson.gz'), 'at') as f:
+            f.writelines(json.dumps({**row._asdict(), 'played_at': row.played_at.isoformat()}) + '\n'
+                         for row in month_rows)
+
+def compact_score_batch(engine, cutoff, limit):
+    """Fold up to ``limit`` scores played before ``cutoff`` into rollups; returns the count."""
+    with engine.begin() as conn:
+        rows = conn.execute(
+            db.select(*EXPORT_COLUMNS).where(Score.played_at < cutoff)
+            .order_by(Score.played_at, Score.id).limit(limit)
+        ).all()
+        if not rows:
+            return 0
+        groups = {}
+        for row in rows:
+            key = (row.user_id, row.played_at.date(), row.grid_size, row.canvas_size, row.game_speed)
+            games, total, best, lowest, verified, rejected, last = groups.get(key, (0, 0, None, None, 0, 0, None))
+            groups[key] = (games + 1, total + row.score,
+                           row.score if best is None else max(best, row.score),
+                           row.score if lowest is None else min(lowest, row.score),
+                           verified + (row.verified is True), rejected + (row.verified is False),
+                           row.played_at if last is None else max(last, row.played_at))
+        for (user_id, day, grid_size, canvas_size, game_speed), values in groups.items():
+            games, total, best, lowest, verified, rejected, last = values
+            updated = conn.execute(
+                db.update(ScoreRollup)
+                .where(ScoreRollup.user_id == user_id, ScoreRollup.day == day, ScoreRollup.grid_size == grid_size,
+                       ScoreRollup.canvas_size == canvas_size, ScoreRollup.game_speed == game_speed)
+                .values(games=ScoreRollup.games + games,
+                        score_sum=ScoreRollup.score_sum + total,
+                        best_score=db.case((ScoreRollup.best_score < best, best), else_=ScoreRollup.best_score),
+                        min_score=db.case((ScoreRollup.min_score > lowest, lowest), else_=ScoreRollup.min_score),
+                        verified_games=ScoreRollup.verified_games + verified,
+                        rejected_games=ScoreRollup.rejected_games + rejected,
+                        last_played_at=db.case((ScoreRollup.last_played_at < last, last),
+                                               else_=ScoreRollup.last_played_at))
+            )
+            if updated.rowcount == 0:
+                conn.execute(db.insert(ScoreRollup).values(
+                    user_id=user_id, day=day, grid_size=grid_size, canvas_size=canvas_size, game_speed=game_speed,
+                    games=games, score_sum=total, best_score=best, min_score=lowest,
+                    verified_games=verified, rejected_games=rejected, last_played_at=last))
+        ids = [row.id for row in rows]
+        conn.execute(db.delete(ScoreReplay).where(ScoreReplay.score_id.in_(ids)))
+        conn.execute(db.delete(Score).where(Score.id.in_(ids)))
+        if SCORE_ARCHIVE_DIR:
+            # Written before the commit: a failed commit can leave duplicates, never gaps
+            archive_scores(rows)
+    return len(rows)
+
+def is_lock_contention(error):
+    message = str(getattr(error, 'orig', error)).lower()
+    return 'database is locked' in message or 'busy' in message
+
+def compact_scores(days=None, batch_size=None):
+    """Roll up scores older than the retention window on every shard; returns the count."""
+    cutoff = retention_cutoff(SCORE_RETENTION_DAYS if days is None else days)
+    compacted = 0
+    for engine in score_engines():
+        attempts = 0
+        while True:
+            try:
+                count = compact_score_batch(engine, cutoff, batch_size or SCORE_COMPACT_BATCH)
+            except OperationalError as e:
+                # Only losing the write lock to score saves is worth waiting out;
+                # a full disk, read-only file or missing table is not
+                if not is_lock_contention(e) or attempts >= SCORE_COMPACT_RETRIES:
+                    raise
+                attempts += 1
+                app.logger.warning('Score compaction waiting for the database lock (attempt %d of %d)',
+                                   attempts, SCORE_COMPACT_RETRIES)
+                time.sleep(min(2 ** attempts, 30))
+                continue
+            attempts = 0
+            if not count:
+                break
+            compacted += count
+            SCORES_COMPACTED.inc(count)
+            # Let queued score writes in between batches
+            time.sleep(0.05)
+    return compacted
+
+@contextmanager
+def compaction_lock():
+    # Yields False when another process is already compacting
+    database = db.engine.url.database if db.engine.url.get_backend_name() == 'sqlite' else None
+    path = f'{database}.compact-lock' if database and database != ':memory:' else \
+        os.path.join(tempfile.gettempdir(), 'snake-game.compact-lock')
+    with open(path, 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class ScoreCompactor:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+
+    def start(self):
+        # Called from gunicorn's post_worker_init; threads do not survive fork
+        if SCORE_RETENTION_DAYS <= 0:
+            return
+        with self.lock:
+            if self.thread is None or self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.thread = threading.Thread(target=self.run, name='score-compactor', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        # Spread workers out so they do not all try the lock at once
+        time.sleep(random.uniform(10, 60))
+        while True:
+            try:
+                with app.app_context(), compaction_lock() as acquired:
+                    if acquired:
+                        compacted = compact_scores()
+                        if compacted:
+                            app.logger.info('Rolled up %d scores older than %d days', compacted,
+                                            SCORE_RETENTION_DAYS)
+            except Exception:
+                app.logger.exception('Score compaction failed')
+            time.sleep(SCORE_COMPACT_INTERVAL * random.uniform(0.9, 1.1))
+
+score_compactor = ScoreCompactor()
+
+# Leaderboards
+# Each worker keeps the best score of the top LEADERBOARD_SIZE players per board
+# (period x game settings) in a sorted list, loaded once and then caught up from
+# new Score ids, so rank and page lookups are bisects instead of ORDER BY over
+# the Score table. A board only ever raises its cut-off within a period, so a
+# player who drops off can only come back with a new personal best. Ranks below
+# the cut-off and player counts come from the database; counts are refreshed
+# every LEADERBOARD_TOTAL_SECONDS.
+LEADERBOARD_PERIODS = ('all', 'daily', 'weekly')
+LEADERBOARD_SYNC_SECONDS = float(os.environ.get('LEADERBOARD_SYNC_SECONDS', '1'))
+LEADERBOARD_SIZE = int(os.environ.get('LEADERBOARD_SIZE', '1000'))
+LEADERBOARD_TOTAL_SECONDS = float(os.environ.get('LEADERBOARD_TOTAL_SECONDS', '30'))
+LEADERBOARD_MAX_PAGE = 100
+
+def period_start(period, now):
+    if period == 'daily':
+        return datetime(now.year, now.month, now.day)
+    if period == 'weekly':
+        return datetime(now.year, now.month, now.day) - timedelta(days=now.weekday())
+    return None
+
+class Ranking:
+    def __init__(self, size):
+        self.size = size
+        self.best = {}
+        # (-score, user_id), so ascending order is best first and ties go to the lower id
+        self.keys = []
+
+    def full(self):
+        return len(self.keys) >= self.size
+
+    def offer(self, user_id, score):
+        # Returns whether this is a new personal best that made the board
+        current = self.best.get(user_id)
+        if current is not None:
+            if score <= current:
+                return False
+            del self.keys[bisect_left(self.keys, (-current, user_id))]
+        elif self.full():
+            if (-score, user_id) >= self.keys[-1]:
+                return False
+            del self.best[self.keys.pop()[1]]
+        self.best[user_id] = score
+        insort(self.keys, (-score, user_id))
+        return True
+
+    def rank_of_score(self, score):
+        # Competition ranking: players with equal scores share a rank
+        return bisect_left(self.keys, (-score, 0)) + 1
+
+    def page(self, after, limit):
+        start = 0 if after is None else bisect_right(self.keys, (-after[0], after[1]))
+        return [(self.rank_of_score(-neg), user_id, -neg) for neg, user_id in self.keys[start:start + limit]]
+
+class Leaderboard:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rankings = {}
+        self.period_starts = None
+        self.last_ids = None
+        self.synced_at = 0.0
+        # (period, config) -> (players, monotonic time counted)
+        self.totals = {}
+        # Scores that reached the top LIVE_FEED_TOP_N since the last take_records()
+        self.records = None
+
+    def mark_stale(self):
+        self.synced_at = 0.0
+
+    def offer(self, period, config, user_id, score):
+        improved = []
+        for key in ((period, None), (period, config)):
+            ranking = self.rankings.get(key)
+            if ranking is None:
+                ranking = self.rankings[key] = Ranking(LEADERBOARD_SIZE)
+            if ranking.offer(user_id, score):
+                improved.append((key, ranking))
+        return improved
+
+    def load(self, starts):
+        def load_shard(index, conn):
+            last_id = conn.execute(db.select(db.func.max(Score.id))).scalar() or 0
+            bests = {}
+            for period in LEADERBOARD_PERIODS:
+                query = (db.select(Score.user_id, Score.grid_size, Score.canvas_size, Score.game_speed,
+                                   db.func.max(Score.score))
+                         .where(Score.id <= last_id)
+                         .group_by(Score.user_id, Score.grid_size, Score.canvas_size, Score.game_speed))
+                rollups = (db.select(ScoreRollup.user_id, ScoreRollup.grid_size, ScoreRollup.canvas_size,
+                                     ScoreRollup.game_speed, db.func.max(ScoreRollup.best_score))
+                           .group_by(ScoreRollup.user_id, ScoreRollup.grid_size, ScoreRollup.canvas_size,
+                                     ScoreRollup.game_speed))
+                if starts[period] is not None:
+                    query = query.where(Score.played_at >= starts[period])
+                    rollups = rollups.where(ScoreRollup.day >= starts[period].date())
+                # One statement, so compaction cannot move a score out of sight between the two
+                bests[period] = conn.execute(query.union_all(rollups)).all()
+            return last_id, bests
+
+        results = fan_out(load_shard)
+        self.rankings = {}
+        players = {}
+        for _, bests in results:
+            for period, rows in bests.items():
+                for user_id, grid_size, canvas_size, game_speed, best in rows:
+                    config = (grid_size, canvas_size, game_speed)
+                    self.offer(period, config, user_id, best)
+                    for key in ((period, None), (period, config)):
+                        players.setdefault(key, set()).add(user_id)
+        # The aggregates already hold every player, so counts start out exact
+        loaded_at = time.monotonic()
+        self.totals = {key: (len(user_ids), loaded_at) for key, user_ids in players.items()}
+        self.last_ids = [last_id for last_id, _ in results]
+        self.period_starts = starts
+
+    def catch_up(self):
+        def new_rows(index, conn):
+            return conn.execute(
+                db.select(Score.id, Score.user_id, Score.score, Score.grid_size, Score.canvas_size,
+                          Score.game_speed, Score.played_at)
+                .where(Score.id > self.last_ids[index])
+                .order_by(Score.id)
+            ).all()
+
+        for index, rows in enumerate(fan_out(new_rows)):
+            for row in rows:
+                for period in LEADERBOARD_PERIODS:
+                    start = self.period_starts[period]
+                    if start is None or row.played_at >= start:
+                        improved = self.offer(period, (row.grid_size, row.canvas_size, row.game_speed),
+                                              row.user_id, row.score)
+                        if self.records is not None:
+                            self.collect_records(improved, row)
+            if rows:
+                self.last_ids[index] = rows[-1].id
+
+    def collect_records(self, improved, row):
+        for (period, config), ranking in improved:
+            rank = ranking.rank_of_score(row.score)
+            if rank <= LIVE_FEED_TOP_N:
+                self.records.append({'period': period, 'config': config, 'user_id': row.user_id,
+                                     'score': row.score, 'rank': rank, 'score_id': row.id})
+
+    def take_records(self):
+        # Called by the live feed relay; starts collecting on first use
+        with self.lock:
+            if self.records is None:
+                self.records = deque(maxlen=LIVE_FEED_BACKLOG)
+            self.sync()
+            records = list(self.records)
+            self.records.clear()
+            return records
+
+    def sync(self):
+        if time.monotonic() - self.synced_at < LEADERBOARD_SYNC_SECONDS:
+            return
+        now = datetime.utcnow()
+        starts = {period: period_start(period, now) for period in LEADERBOARD_PERIODS}
+        if self.last_ids is None or starts != self.period_starts:
+            # First use, or a day/week boundary passed: rebuild from aggregates
+            self.load(starts)
+        else:
+            self.catch_up()
+        self.synced_at = time.monotonic()
+
+    def page(self, period, config, after, limit):
+        # Pages only reach the players held in memory
+        with self.lock:
+            self.sync()
+            ranking = self.rankings.get((period, config))
+            if ranking is None:
+                return [], 0
+            entries = ranking.page(after, limit)
+            start = self.period_starts[period]
+        return entries, self.total(period, config, start)
+
+    def rank(self, period, config, user_id):
+        with self.lock:
+            self.sync()
+            ranking = self.rankings.get((period, config))
+            if ranking is None:
+                return None, None, 0
+            start = self.period_starts[period]
+            score = ranking.best.get(user_id)
+            rank = None if score is None else ranking.rank_of_score(score)
+            # Off a board that is not full means off the board
+            below_cutoff = score is None and ranking.full()
+        if below_cutoff:
+            score = board_best(start, config, user_id)
+            if score is not None:
+                rank = board_players(start, config, above=score) + 1
+        return rank, score, self.total(period, config, start)
+
+    def total(self, period, config, start):
+        key = (period, config)
+        with self.lock:
+            total, counted_at = self.totals.get(key, (0, 0.0))
+        if time.monotonic() - counted_at < LEADERBOARD_TOTAL_SECONDS:
+            return total
+        total = board_players(start, config)
+        with self.lock:
+            # A reload for a new period may have replaced the counts meanwhile
+            if self.period_starts[period] == start:
+                self.totals[key] = (total, time.monotonic())
+        return total
+
+def board_filters(start, config):
+    # Where clauses for one board on Score and on ScoreRollup
+    scores, rollups = [], []
+    if start is not None:
+        scores.append(Score.played_at >= start)
+        rollups.append(ScoreRollup.day >= start.date())
+    if config is not None:
+        scores += [Score.grid_size == config[0], Score.canvas_size == config[1], Score.game_speed == config[2]]
+        rollups += [ScoreRollup.grid_size == config[0], ScoreRollup.canvas_size == config[1],
+                    ScoreRollup.game_speed == config[2]]
+    return scores, rollups
+
+def board_players(start, config, above=None):
+    # Players on a board, or only those whose best beats `above`; each player
+    # lives on one shard, so the shard counts add up
+    score_filters, rollup_filters = board_filters(start, config)
+    if above is not None:
+        score_filters.append(Score.score > above)
+        rollup_filters.append(ScoreRollup.best_score > above)
+    players = db.union(db.select(Score.user_id).where(*score_filters),
+                       db.select(ScoreRollup.user_id).where(*rollup_filters)).subquery()
+    return sum(fan_out(lambda index, conn: conn.execute(
+        db.select(db.func.count()).select_from(players)).scalar()))
+
+def board_best(start, config, user_id):
+    score_filters, rollup_filters = board_filters(start, config)
+    bests = db.union_all(
+        db.select(db.func.max(Score.score).label('best')).where(Score.user_id == user_id, *score_filters),
+        db.select(db.func.max(ScoreRollup.best_score)).where(ScoreRollup.user_id == user_id, *rollup_filters)
+    ).subquery()
+    return score_read_execute(db.select(db.func.max(bests.c.best)), user_id).scalar()
+
+leaderboard = Leaderboard()
+
+# Live Feed
+# /api/feed streams new records (scores entering the top LIVE_FEED_TOP_N of any
+# leaderboard) as Server-Sent Events. Every worker on every replica writes its
+# scores to the same database, so the database is the broadcast channel: a relay
+# thread in each worker that has listeners picks up new Score rows through the
+# leaderboard's catch-up and fans the records out. A commit in the same worker
+# wakes the relay immediately; other workers and replicas see it within
+# LIVE_FEED_POLL_SECONDS. Each listener has a buffer of LIVE_FEED_CLIENT_BUFFER
+# events that keeps only the newest record per leaderboard, so a slow reader
+# skips superseded records instead of growing memory. An open stream occupies
+# a whole sync worker or gthread thread, so the feed is only offered (up to
+# LIVE_FEED_MAX_CLIENTS per worker) under GUNICORN_WORKER_CLASS=gevent.
+LIVE_FEED_TOP_N = int(os.environ.get('LIVE_FEED_TOP_N', '3'))
+LIVE_FEED_POLL_SECONDS = float(os.environ.get('LIVE_FEED_POLL_SECONDS', '1'))
+LIVE_FEED_CLIENT_BUFFER = int(os.environ.get('LIVE_FEED_CLIENT_BUFFER', '16'))
+LIVE_FEED_BACKLOG = 1000
+LIVE_FEED_MAX_CLIENTS = int(os.environ.get(
+    'LIVE_FEED_MAX_CLIENTS', '1000' if os.environ.get('GUNICORN_WORKER_CLASS') == 'gevent' else '0'))
+LIVE_FEED_HEARTBEAT_SECONDS = 15
+# Streams end after this long and the browser reconnects, so no connection
+# outlives a deploy by much
+LIVE_FEED_STREAM_SECONDS = float(os.environ.get('LIVE_FEED_STREAM_SECONDS', '300'))
+
+LIVE_FEED_CLIENTS = Gauge('snake_live_feed_clients', 'Connected live feed listeners',
+                          multiprocess_mode='livesum')
+LIVE_FEED_EVENTS = Counter('snake_live_feed_events_total', 'Live feed events by outcome', ['outcome'])
+
+class FeedListener:
+    def __init__(self):
+        self.ready = threading.Condition()
+        # Newest event per leaderboard, oldest leaderboard first
+        self.pending = OrderedDict()
+
+    def push(self, key, event):
+        with self.ready:
+            if self.pending.pop(key, None) is not None:
+                LIVE_FEED_EVENTS.labels('coalesced').inc()
+            self.pending[key] = event
+            if len(self.pending) > LIVE_FEED_CLIENT_BUFFER:
+                self.pending.popitem(last=False)
+                LIVE_FEED_EVENTS.labels('dropped').inc()
+            self.ready.notify()
+
+    def take(self, timeout):
+        with self.ready:
+            if not self.pending:
+                self.ready.wait(timeout)
+            events = list(self.pending.values())
+            self.pending.clear()
+            return events
+
+class LiveFeed:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.listeners = set()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.pid = None
+
+    def subscribe(self):
+        with self.lock:
+            if self.pid != os.getpid():
+                # Threads and listeners do not survive fork
+                self.listeners, self.thread, self.pid = set(), None, os.getpid()
+            if len(self.listeners) >= LIVE_FEED_MAX_CLIENTS:
+                return None
+            listener = FeedListener()
+            self.listeners.add(listener)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='live-feed', daemon=True)
+                self.thread.start()
+        LIVE_FEED_CLIENTS.inc()
+        return listener
+
+    def unsubscribe(self, listener):
+        with self.lock:
+            self.listeners.discard(listener)
+        LIVE_FEED_CLIENTS.dec()
+
+    def notify(self):
+        if self.listeners:
+            self.wakeup.set()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(LIVE_FEED_POLL_SECONDS)
+            self.wakeup.clear()
+            with self.lock:
+                listeners = list(self.listeners)
+            if not listeners:
+                continue
+            try:
+                with app.app_context():
+                    self.publish(listeners, leaderboard.take_records())
+            except Exception:
+                app.logger.exception('Live feed relay failed')
+
+    def publish(self, listeners, records):
+        if not records:
+            return
+        # One event per score, for the most notable leaderboard it entered:
+        # all time before weekly before daily, overall before per-settings
+        notability = {'all': 0, 'weekly': 1, 'daily': 2}
+        best = {}
+        for record in records:
+            current = best.get(record['score_id'])
+            key = (notability[record['period']], record['config'] is not None, record['rank'])
+            if current is None or key < current[0]:
+                best[record['score_id']] = (key, record)
+        # Coalesce: only the newest record per leaderboard in this round is sent
+        latest = {}
+        for _, record in sorted(best.values(), key=lambda item: item[1]['score_id']):
+            latest.pop((record['period'], record['config']), None)
+            latest[(record['period'], record['config'])] = record
+        with get_read_engine().connect() as conn:
+            usernames = dict(conn.execute(
+                db.select(User.id, User.username).where(User.id.in_({r['user_id'] for r in latest.values()}))
+            ).all())
+        LIVE_FEED_EVENTS.labels('coalesced').inc(len(records) - len(latest))
+        for key, record in latest.items():
+            grid_size, canvas_size, game_speed = record['config'] or (None, None, None)
+            event = (f'id: {record["score_id"]}\nevent: record\ndata: ' + json.dumps({
+                'period': record['period'], 'grid_size': grid_size, 'canvas_size': canvas_size,
+                'game_speed': game_speed, 'username': usernames.get(record['user_id']),
+                'score': record['score'], 'rank': record['rank'],
+            }) + '\n\n')
+            for listener in listeners:
+                listener.push(key, event)
+            LIVE_FEED_EVENTS.labels('published').inc()
+
+live_feed = LiveFeed()
+
+def live_feed_stream(listener):
+    try:
+        yield 'retry: 5000\n\n'
+        deadline = time.monotonic() + LIVE_FEED_STREAM_SECONDS
+        while time.monotonic() < deadline and not readiness_state['shutting_down']:
+            events = listener.take(LIVE_FEED_HEARTBEAT_SECONDS)
+            # A comment line doubles as a heartbeat that detects closed connections
+            yield ''.join(events) if events else ': keepalive\n\n'
+    finally:
+        live_feed.unsubscribe(listener)
+
+# Score History
+# Keyset pagination on (played_at, id) walks ix_score_user_played_at, so every
+# page costs the same however far back it is. Only the displayed columns are
+# selected and rows come back as tuples rather than ORM objects.
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE = 200
+HISTORY_COLUMNS = (Score.id, Score.played_at, Score.score, Score.snake_length, Score.foods_eaten,
+                   Score.game_speed, Score.canvas_size, Score.grid_size, Score.verified)
+
+def encode_history_cursor(row):
+    return f'{row.played_at.isoformat()}_{row.id}'
+
+def decode_history_cursor(cursor):
+    played_at, score_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(played_at), int(score_id)
+
+def fetch_score_page(user_id, before=None, limit=HISTORY_PAGE_SIZE):
+    query = db.select(*HISTORY_COLUMNS).where(Score.user_id == user_id)
+    if before is not None:
+        played_at, score_id = before
+        query = query.where(db.or_(Score.played_at < played_at,
+                                   db.and_(Score.played_at == played_at, Score.id < score_id)))
+    # Fetch one extra row to know whether another page exists
+    rows = score_read_execute(query.order_by(Score.played_at.desc(), Score.id.desc()).limit(limit + 1),
+                              user_id).all()
+    next_cursor = encode_history_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+# Score Export
+# Exports are generated chunk by chunk with keyset pagination, each chunk a short
+# read on its own connection. Memory stays flat however many rows there are,
+# and no read transaction stays open for the whole export (a long-lived reader
+# would stop SQLite from checkpointing the WAL). Player exports walk
+# ix_score_user_played_at newest first; full exports go by id, shard by shard.
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', '5000'))
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+EXPORT_FIELDS = ('id', 'user_id', 'username', 'played_at', 'score', 'snake_length', 'foods_eaten',
+                 'game_speed', 'canvas_size', 'grid_size', 'verified')
+EXPORT_COLUMNS = (Score.id, Score.user_id, Score.played_at, Score.score, Score.snake_length, Score.foods_eaten,
+                  Score.game_speed, Score.canvas_size, Score.grid_size, Score.verified)
+
+def iter_score_chunks(user_id=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Return a generator of lists of exported score dicts (EXPORT_FIELDS).
+
+    Engines are resolved here, inside the app context, because the generator
+    itself runs after the request context is gone.
+    """
+    if user_id is not None:
+        engines = [score_engine_for(user_id) if SCORE_SHARDS > 1 else get_read_engine()]
+    else:
+        engines = get_shard_engines() if SCORE_SHARDS > 1 else [get_read_engine()]
+    user_engine = get_read_engine()
+
+    def chunks():
+        for engine in engines:
+            last = None
+            while True:
+                query = db.select(*EXPORT_COLUMNS)
+                if user_id is None:
+                    if last is not None:
+                        query = query.where(Score.id > last.id)
+                    query = query.order_by(Score.id)
+                else:
+                    query = query.where(Score.user_id == user_id)
+                    if last is not None:
+                        query = query.where(db.or_(Score.played_at < last.played_at,
+                                                   db.and_(Score.played_at == last.played_at, Score.id < last.id)))
+                    query = query.order_by(Score.played_at.desc(), Score.id.desc())
+                with engine.connect() as conn:
+                    rows = conn.execute(query.limit(chunk_size)).all()
+                if not rows:
+                    break
+                # Users live in the main database, so names are looked up per chunk
+                with user_engine.connect() as conn:
+                    usernames = dict(conn.execute(
+                        db.select(User.id, User.username).where(User.id.in_({row.user_id for row in rows}))
+                    ).all())
+                yield [{**row._asdict(), 'username': usernames.get(row.user_id),
+                        'played_at': row.played_at.isoformat() if row.played_at else None} for row in rows]
+                last = rows[-1]
+
+    return chunks()
+
+def format_score_chunks(chunks, fmt):
+    # One string per chunk keeps the number of writes (and WSGI iterations) low
+    if fmt == 'ndjson':
+        for rows in chunks:
+            yield ''.join(json.dumps(row) + '\n' for row in rows)
+        return
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, EXPORT_FIELDS, lineterminator='\n')
+    writer.writeheader()
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def parse_score_records(lines, fmt):
+    """Yield score dicts read from an NDJSON or CSV export."""
+    if fmt == 'ndjson':
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+        return
+    for record in csv.DictReader(lines):
+        # CSV has no nulls or booleans: empty cells are missing values
+        verified = record.get('verified') or None
+        record['verified'] = None if verified is None else verified.lower() in ('true', '1')
+        yield {key: value if value != '' else None for key, value in record.items()}
+
+IMPORT_OUTCOMES = ('inserted', 'duplicate', 'unknown_player', 'no_username', 'invalid')
+
+def import_score_row(record, user_ids):
+    """The row to insert for an exported record, or None and why it is skipped."""
+    if not record.get('username'):
+        # Exported user ids belong to the source installation
+        return None, 'no_username'
+    user_id = user_ids.get(record['username'])
+    if user_id is None:
+        return None, 'unknown_player'
+    try:
+        row = {
+            'user_id': user_id,
+            'played_at': datetime.fromisoformat(record['played_at']),
+            **{name: int(record[name]) for name in ('score', 'snake_length', 'foods_eaten', 'game_speed',
+                                                    'canvas_size', 'grid_size')},
+            'verified': record.get('verified'),
+        }
+    except (KeyError, TypeError, ValueError):
+        return None, 'invalid'
+    if row['verified'] not in (None, True, False) or score_row_error(row):
+        return None, 'invalid'
+    return row, None
+
+def import_score_batch(records):
+    """Insert exported records, matching players by username.
+
+    Records without a username, for unknown players or with bad values are
+    skipped, as are scores already stored (same player, played_at and score),
+    so an interrupted import can simply be run again. Returns the number of
+    records per IMPORT_OUTCOMES entry.
+    """
+    names = {record['username'] for record in records if record.get('username')}
+    user_ids = dict(db.session.execute(
+        db.select(User.username, User.id).where(User.username.in_(names))
+    ).all()) if names else {}
+    outcome = dict.fromkeys(IMPORT_OUTCOMES, 0)
+    rows = []
+    for record in records:
+        row, reason = import_score_row(record, user_ids)
+        if row is None:
+            outcome[reason] += 1
+        else:
+            rows.append(row)
+    if rows:
+        users = {row['user_id'] for row in rows}
+        first, last = min(row['played_at'] for row in rows), max(row['played_at'] for row in rows)
+        stored = fan_out(lambda index, conn: conn.execute(
+            db.select(Score.user_id, Score.played_at, Score.score)
+            .where(Score.user_id.in_(users), Score.played_at.between(first, last))).all())
+        seen = {tuple(row) for shard in stored for row in shard}
+        new_rows = []
+        for row in rows:
+            key = (row['user_id'], row['played_at'], row['score'])
+            if key in seen:
+                outcome['duplicate'] += 1
+            else:
+                seen.add(key)
+                new_rows.append(row)
+        if new_rows:
+            persist_scores(new_rows)
+        outcome['inserted'] += len(new_rows)
+    return outcome
+
+# Score Analytics
+# The dashboard charts are computed from a per-worker cache of each player's
+# scores held as NumPy columns (about 50 bytes a game), so even a heavy
+# player's view is a few vectorized passes instead of thousands of ORM rows.
+# New games are appended by a query for ids newer than the cached ones: on the
+# next view in the worker that saved them, within ANALYTICS_SYNC_SECONDS in the
+# others. Rolled-up days (see Score Retention) count towards totals, bests and
+# the daily trend; the histogram and moving average cover the games that are
+# still stored one by one.
+ANALYTICS_CACHE_USERS = int(os.environ.get('ANALYTICS_CACHE_USERS', '256'))
+ANALYTICS_CACHE_TTL = float(os.environ.get('ANALYTICS_CACHE_TTL', '600'))
+ANALYTICS_SYNC_SECONDS = float(os.environ.get('ANALYTICS_SYNC_SECONDS', '5'))
+ANALYTICS_HISTOGRAM_BINS = 20
+ANALYTICS_MOVING_WINDOW = 20
+ANALYTICS_MAX_POINTS = 200
+ANALYTICS_TREND_DAYS = 30
+ANALYTICS_RESYNC_IDS = 1000
+SETTINGS_FIELDS = ('game_speed', 'grid_size', 'canvas_size')
+ANALYTICS_SCORE_COLUMNS = (Score.id, Score.played_at, Score.score, Score.game_speed, Score.grid_size,
+                           Score.canvas_size)
+
+ANALYTICS_CACHE_REQUESTS = Counter('snake_analytics_cache_requests_total', 'Score analytics cache lookups',
+                                   ['result'])
+
+class ScoreColumns:
+    """One player's scores as parallel arrays in played_at order, plus their rollups."""
+
+    def __init__(self, rows, rollups):
+        self.ids = np.empty(0, np.int64)
+        self.times = np.empty(0, np.int64)
+        self.scores = np.empty(0, np.int64)
+        self.settings = np.empty((0, 3), np.int64)
+        self.append(rows)
+        rollups = list(rollups)
+        self.rollup_days = np.array([row.day for row in rollups], 'datetime64[D]').astype(np.int64)
+        self.rollup_settings = np.array([[getattr(row, name) for name in SETTINGS_FIELDS] for row in rollups],
+                                        np.int64).reshape(-1, 3)
+        self.rollup_games = np.array([row.games for row in rollups], np.int64)
+        self.rollup_sums = np.array([row.score_sum for row in rollups], np.int64)
+        self.rollup_bests = np.array([row.best_score for row in rollups], np.int64)
+        self.loaded_at = self.synced_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.cached_summary = None
+
+    def append(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        self.cached_summary = None
+        ids, played_at, scores, *settings = zip(*rows)
+        held = len(self.times)
+        self.ids = np.concatenate([self.ids, np.array(ids, np.int64)])
+        self.times = np.concatenate([self.times, np.array(played_at, 'datetime64[s]').astype(np.int64)])
+        self.scores = np.concatenate([self.scores, np.array(scores, np.int64)])
+        self.settings = np.concatenate([self.settings, np.array(settings, np.int64).T])
+        if held and self.times[held] < self.times[held - 1]:
+            # A game stamped before the cached tail committed late (batched writes,
+            # another worker): put it back in played_at order
+            order = np.lexsort((self.ids, self.times))
+            self.ids, self.times = self.ids[order], self.times[order]
+            self.scores, self.settings = self.scores[order], self.settings[order]
+
+    def summary(self):
+        # Kept until the next append, so repeat views between games cost nothing
+        with self.lock:
+            if self.cached_summary is None:
+                self.cached_summary = score_analytics_summary(self)
+            return self.cached_summary
+
+class ScoreAnalyticsCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def mark_stale(self, user_ids):
+        with self.lock:
+            for user_id in user_ids:
+                if user_id in self.entries:
+                    self.entries[user_id].synced_at = 0.0
+
+    def get(self, user_id):
+        with self.lock:
+            columns = self.entries.get(user_id)
+            if columns is not None:
+                self.entries.move_to_end(user_id)
+        now = time.monotonic()
+        if columns is None or now - columns.loaded_at >= ANALYTICS_CACHE_TTL:
+            # The TTL also picks up compaction and imported back-dated games
+            ANALYTICS_CACHE_REQUESTS.labels('load').inc()
+            columns = self.load(user_id)
+            with self.lock:
+                self.entries[user_id] = columns
+                self.entries.move_to_end(user_id)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+        elif now - columns.synced_at >= ANALYTICS_SYNC_SECONDS:
+            ANALYTICS_CACHE_REQUESTS.labels('sync').inc()
+            # Ids are assigned on insert, so a transaction that started earlier (a
+            # ScoreWriter batch, another worker) can commit ids just below ones already
+            # cached. Re-reading a short id window below the watermark catches those
+            # on the player's index; append() restores played_at order.
+            floor = int(columns.ids.max()) - ANALYTICS_RESYNC_IDS if len(columns.ids) else 0
+            rows = score_read_execute(
+                db.select(*ANALYTICS_SCORE_COLUMNS).where(Score.user_id == user_id, Score.id > floor)
+                .order_by(Score.id), user_id).all()
+            with columns.lock:
+                # Rows in the window, or appended by a concurrent view, are already held
+                held = set(columns.ids[columns.ids > floor].tolist()) if rows else ()
+                columns.append(row for row in rows if row.id not in held)
+                columns.synced_at = now
+        else:
+            ANALYTICS_CACHE_REQUESTS.labels('hit').inc()
+        return columns
+
+    def load(self, user_id):
+        rows = score_read_execute(
+            db.select(*ANALYTICS_SCORE_COLUMNS).where(Score.user_id == user_id)
+            .order_by(Score.played_at, Score.id), user_id).all()
+        rollups = score_read_execute(
+            db.select(ScoreRollup.day, ScoreRollup.game_speed, ScoreRollup.grid_size, ScoreRollup.canvas_size,
+                      ScoreRollup.games, ScoreRollup.score_sum, ScoreRollup.best_score)
+            .where(ScoreRollup.user_id == user_id), user_id).all()
+        return ScoreColumns(rows, rollups)
+
+score_analytics = ScoreAnalyticsCache(ANALYTICS_CACHE_USERS)
+
+def group_scores(keys, games, sums, bests):
+    """Totals per distinct value of the 1-D ``keys``: keys, games, sums, bests."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    best = np.full(len(unique), np.iinfo(np.int64).min)
+    np.maximum.at(best, inverse, bests)
+    return (unique, np.bincount(inverse, games, len(unique)).astype(np.int64),
+            np.bincount(inverse, sums, len(unique)).astype(np.int64), best)
+
+def settings_keys(settings):
+    """Pack each (speed, grid, canvas) row into one integer so grouping stays a 1-D sort.
+
+    Returns the keys and a function mapping keys back to rows of setting values.
+    """
+    columns = [np.unique(settings[:, i], return_inverse=True) for i in range(settings.shape[1])]
+    dims = tuple(len(values) for values, _ in columns)
+    keys = np.ravel_multi_index([codes.reshape(-1) for _, codes in columns], dims)
+    def unpack(packed):
+        codes = np.unravel_index(packed, dims)
+        return np.stack([values[code] for (values, _), code in zip(columns, codes)], axis=1)
+    return keys, unpack
+
+def score_analytics_summary(columns):
+    scores, times = columns.scores, columns.times
+    # Every raw game counts once; rollup rows carry their own counts
+    games = np.concatenate([np.ones(len(scores), np.int64), columns.rollup_games])
+    sums = np.concatenate([scores, columns.rollup_sums])
+    bests = np.concatenate([scores, columns.rollup_bests])
+    summary = {'games': int(games.sum()), 'games_listed': len(scores)}
+
+    if len(scores):
+        # Integer-wide bins spanning the player's own range, whatever the stored values
+        low, high = int(scores.min()), int(scores.max())
+        width = max(1, -(-(high - low + 1) // ANALYTICS_HISTOGRAM_BINS))
+        counts, _ = np.histogram(scores, low + width * np.arange(-(-(high - low + 1) // width) + 1))
+        summary['histogram'] = {'start': low, 'bin_width': width, 'counts': counts.tolist()}
+        window = min(ANALYTICS_MOVING_WINDOW, len(scores))
+        totals = np.concatenate([[0], np.cumsum(scores)])
+        averages = (totals[window:] - totals[:-window]) / window
+        points = np.unique(np.linspace(0, len(averages) - 1, min(len(averages), ANALYTICS_MAX_POINTS)).astype(int))
+        summary['moving_average'] = {
+            'window': window,
+            'points': [[datetime.fromtimestamp(int(at), timezone.utc).isoformat(), round(float(value), 1)]
+                       for at, value in zip(times[window - 1:][points], averages[points])],
+        }
+    else:
+        summary['histogram'] = {'start': 0, 'bin_width': 1, 'counts': []}
+        summary['moving_average'] = {'window': 0, 'points': []}
+
+    settings = np.concatenate([columns.settings, columns.rollup_settings])
+    by_settings = []
+    if len(settings):
+        packed, unpack = settings_keys(settings)
+        keys, key_games, key_sums, key_bests = group_scores(packed, games, sums, bests)
+        keys = unpack(keys)
+        order = np.argsort(-key_bests, kind='stable')
+        by_settings = [{**dict(zip(SETTINGS_FIELDS, map(int, keys[i]))), 'games': int(key_games[i]),
+                        'best': int(key_bests[i]), 'average': round(float(key_sums[i] / key_games[i]), 1)}
+                       for i in order]
+    summary['best_by_settings'] = by_settings
+    summary['best_by'] = {}
+    for column, name in enumerate(SETTINGS_FIELDS):
+        if len(settings):
+            keys, key_games, _, key_bests = group_scores(settings[:, column], games, sums, bests)
+            summary['best_by'][name] = [{'value': int(key), 'games': int(count), 'best': int(best)}
+                                        for key, count, best in zip(keys, key_games, key_bests)]
+        else:
+            summary['best_by'][name] = []
+
+    days = np.concatenate([times // 86400, columns.rollup_days])
+    daily = []
+    trend = {'days': 0, 'slope_per_day': None, 'direction': None}
+    if len(days):
+        keys, day_games, day_sums, day_bests = group_scores(days, games, sums, bests)
+        day_numbers, day_averages = keys, day_sums / day_games
+        recent = slice(-ANALYTICS_MAX_POINTS, None)
+        daily = [{'day': str(np.datetime64(int(day), 'D')), 'games': int(count), 'average': round(float(avg), 1),
+                  'best': int(best)}
+                 for day, count, avg, best in zip(day_numbers[recent], day_games[recent], day_averages[recent],
+                                                  day_bests[recent])]
+        # Least-squares line through the daily averages of the last ANALYTICS_TREND_DAYS
+        # days played, weighted so busy days count more than single games
+        window = slice(-ANALYTICS_TREND_DAYS, None)
+        if len(day_numbers[window]) >= 2:
+            slope = np.polyfit(day_numbers[window], day_averages[window], 1, w=np.sqrt(day_games[window]))[0]
+            span = int(day_numbers[window][-1] - day_numbers[window][0])
+            overall = day_sums[window].sum() / day_games[window].sum()
+            # Changes under 5% of the average over the period count as steady
+            steady = abs(slope) * span < 0.05 * max(overall, 1)
+            trend = {'days': len(day_numbers[window]), 'slope_per_day': round(float(slope), 2),
+                     'direction': 'steady' if steady else 'improving' if slope > 0 else 'declining'}
+    summary['daily'] = daily
+    summary['trend'] = trend
+    return summary
+
+# Stylesheet Template
+# Precompiled Tailwind from build_assets.py when available, otherwise the CDN JIT build
+STYLESHEET_TEMPLATE = """{% if asset_url('app.css', required=False) %}<link rel="stylesheet" href="{{ asset_url('app.css') }}">{% else %}<script src="https://cdn.tailwindcss.com"></script>{% endif %}"""
 
 # Navigation Template
 NAV_TEMPLATE = """
@@ -82,7 +1809,7 @@ GAME_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Snake Game</title>
-    <script src="https://cdn.tailwindcss.com"></script>
+    """ + STYLESHEET_TEMPLATE + """
     <style>
         @keyframes pulse {
             0%, 100% { opacity: 1; }
@@ -93,7 +1820,7 @@ GAME_TEMPLATE = """
         }
     </style>
 </head>
-<body class="bg-gradient-to-br from-purple-600 via-pink-500 to-red-500 min-h-screen p-2 sm:p-4">
+<body data-authenticated="{{ 'true' if current_user.is_authenticated else 'false' }}" class="bg-gradient-to-br from-purple-600 via-pink-500 to-red-500 min-h-screen p-2 sm:p-4">
     <div class="max-w-5xl mx-auto">
         """ + NAV_TEMPLATE + """
         <div class="bg-white/10 backdrop-blur-lg rounded-2xl sm:rounded-3xl p-4 sm:p-6 md:p-8 shadow-2xl">
@@ -157,12 +1884,16 @@ GAME_TEMPLATE = """
 
             <!-- Game Canvas -->
             <div class="flex justify-center mb-4 sm:mb-6 overflow-x-auto">
-                <canvas id="gameCanvas" width="400" height="400" class="border-2 sm:border-4 border-white rounded-xl shadow-2xl bg-gray-900 max-w-full h-auto" style="max-width: min(100%, 400px);"></canvas>
+                <div class="relative">
+                    <canvas id="gameCanvas" width="400" height="400" class="border-2 sm:border-4 border-white rounded-xl shadow-2xl bg-gray-900 max-w-full h-auto" style="max-width: min(100%, 400px);"></canvas>
+                    <div id="fpsOverlay" class="hidden absolute top-2 left-2 bg-black/60 text-green-300 text-xs font-mono px-2 py-1 rounded pointer-events-none"></div>
+                </div>
             </div>
 
             <!-- Instructions and Controls -->
             <div class="text-center mb-4">
                 <p class="text-white text-sm sm:text-base md:text-lg mb-3 sm:mb-2">Use Arrow Keys or WASD to move</p>
+                <p class="text-white/70 text-xs mb-3 sm:mb-2">Press F to show frame stats</p>
                 <div class="flex flex-col sm:flex-row justify-center gap-3 sm:gap-4">
                     <button onclick="restartGame()" class="bg-blue-500 hover:bg-blue-600 active:bg-blue-700 text-white px-6 py-3 sm:py-3 rounded-xl font-bold transition-all shadow-lg text-sm sm:text-base min-h-[44px]">
                         🔄 Restart Game
@@ -190,6 +1921,12 @@ GAME_TEMPLATE = """
                     </div>
                 </div>
             </div>
+
+            <!-- Live Records (filled from /api/feed when the server offers it) -->
+            <div id="liveFeed" class="hidden bg-white/20 rounded-xl p-3 sm:p-4 mt-4">
+                <h3 class="text-white font-semibold mb-2 text-sm sm:text-base">🏆 Live Records</h3>
+                <ul id="liveFeedList" class="space-y-1 text-white/80 text-xs sm:text-sm"></ul>
+            </div>
         </div>
 
         <!-- Game Over Modal -->
@@ -209,323 +1946,7 @@ GAME_TEMPLATE = """
             </div>
         </div>
 
-        <script>
-            const canvas = document.getElementById('gameCanvas');
-            const ctx = canvas.getContext('2d');
-            const scoreEl = document.getElementById('score');
-            const highScoreEl = document.getElementById('highScore');
-            const gameOverEl = document.getElementById('gameOver');
-            const finalScoreEl = document.getElementById('finalScore');
-            const finalLengthEl = document.getElementById('finalLength');
-            const speedDisplayEl = document.getElementById('speedDisplay');
-            const currentSpeedEl = document.getElementById('currentSpeed');
-            const snakeLengthEl = document.getElementById('snakeLength');
-            const foodsEatenEl = document.getElementById('foodsEaten');
-            const canvasSizeEl = document.getElementById('canvasSize');
-            const gridInfoEl = document.getElementById('gridInfo');
-            const autoSpeedCheckbox = document.getElementById('autoSpeed');
-
-            let canvasSize = 400;
-            let gridSize = 20;
-            let tileCount = canvasSize / gridSize;
-
-            let snake = [{x: 10, y: 10}];
-            let dx = 0;
-            let dy = 0;
-            let food = {x: 15, y: 15};
-            let score = 0;
-            let foodsEaten = 0;
-            let highScore = localStorage.getItem('snakeHighScore') || 0;
-            let gameRunning = true;
-            let gamePaused = false;
-            let baseSpeed = 5;
-            let gameSpeed = 100;
-            let lastUpdateTime = 0;
-
-            highScoreEl.textContent = highScore;
-            updateSpeedDisplay();
-            gridInfoEl.textContent = tileCount + 'x' + tileCount;
-
-            function drawGame(timestamp) {
-                if (!gameRunning) return;
-                if (gamePaused) {
-                    requestAnimationFrame(drawGame);
-                    return;
-                }
-
-                if (timestamp - lastUpdateTime < gameSpeed) {
-                    requestAnimationFrame(drawGame);
-                    return;
-                }
-
-                lastUpdateTime = timestamp;
-                moveSnake();
-                
-                if (checkCollision()) {
-                    gameOver();
-                    return;
-                }
-
-                clearCanvas();
-                drawFood();
-                drawSnake();
-                
-                requestAnimationFrame(drawGame);
-            }
-
-            function clearCanvas() {
-                ctx.fillStyle = '#111827';
-                ctx.fillRect(0, 0, canvas.width, canvas.height);
-                
-                ctx.strokeStyle = '#1f2937';
-                ctx.lineWidth = 0.5;
-                for (let i = 0; i < tileCount; i++) {
-                    ctx.beginPath();
-                    ctx.moveTo(i * gridSize, 0);
-                    ctx.lineTo(i * gridSize, canvas.height);
-                    ctx.stroke();
-                    ctx.beginPath();
-                    ctx.moveTo(0, i * gridSize);
-                    ctx.lineTo(canvas.width, i * gridSize);
-                    ctx.stroke();
-                }
-            }
-
-            function drawSnake() {
-                snake.forEach((segment, index) => {
-                    const gradient = ctx.createLinearGradient(
-                        segment.x * gridSize, segment.y * gridSize,
-                        segment.x * gridSize + gridSize, segment.y * gridSize + gridSize
-                    );
-                    
-                    if (index === 0) {
-                        gradient.addColorStop(0, '#10b981');
-                        gradient.addColorStop(1, '#059669');
-                    } else {
-                        gradient.addColorStop(0, '#34d399');
-                        gradient.addColorStop(1, '#10b981');
-                    }
-                    
-                    ctx.fillStyle = gradient;
-                    ctx.fillRect(segment.x * gridSize + 1, segment.y * gridSize + 1, gridSize - 2, gridSize - 2);
-                    
-                    if (index === 0) {
-                        ctx.fillStyle = 'white';
-                        const eyeSize = Math.max(2, gridSize / 8);
-                        const eyeOffset = gridSize / 4;
-                        ctx.fillRect(segment.x * gridSize + eyeOffset, segment.y * gridSize + eyeOffset, eyeSize, eyeSize);
-                        ctx.fillRect(segment.x * gridSize + gridSize - eyeOffset - eyeSize, segment.y * gridSize + eyeOffset, eyeSize, eyeSize);
-                    }
-                });
-                snakeLengthEl.textContent = snake.length;
-            }
-
-            function moveSnake() {
-                if (dx === 0 && dy === 0) return;
-
-                const head = {x: snake[0].x + dx, y: snake[0].y + dy};
-                snake.unshift(head);
-
-                if (head.x === food.x && head.y === food.y) {
-                    score++;
-                    foodsEaten++;
-                    scoreEl.textContent = score;
-                    foodsEatenEl.textContent = foodsEaten;
-                    
-                    if (score > highScore) {
-                        highScore = score;
-                        highScoreEl.textContent = highScore;
-                        localStorage.setItem('snakeHighScore', highScore);
-                    }
-                    
-                    if (autoSpeedCheckbox.checked && foodsEaten % 3 === 0) {
-                        baseSpeed = Math.min(10, baseSpeed + 1);
-                        updateSpeedDisplay();
-                        calculateGameSpeed();
-                    }
-                    
-                    generateFood();
-                } else {
-                    snake.pop();
-                }
-            }
-
-            function drawFood() {
-                const gradient = ctx.createRadialGradient(
-                    food.x * gridSize + gridSize / 2, food.y * gridSize + gridSize / 2, 0,
-                    food.x * gridSize + gridSize / 2, food.y * gridSize + gridSize / 2, gridSize / 2
-                );
-                gradient.addColorStop(0, '#ef4444');
-                gradient.addColorStop(1, '#dc2626');
-                
-                ctx.fillStyle = gradient;
-                ctx.beginPath();
-                ctx.arc(food.x * gridSize + gridSize / 2, food.y * gridSize + gridSize / 2, gridSize / 2 - 2, 0, Math.PI * 2);
-                ctx.fill();
-            }
-
-            function generateFood() {
-                food = {
-                    x: Math.floor(Math.random() * tileCount),
-                    y: Math.floor(Math.random() * tileCount)
-                };
-                
-                for (let segment of snake) {
-                    if (segment.x === food.x && segment.y === food.y) {
-                        generateFood();
-                        break;
-                    }
-                }
-            }
-
-            function checkCollision() {
-                const head = snake[0];
-                
-                if (head.x < 0 || head.x >= tileCount || head.y < 0 || head.y >= tileCount) {
-                    return true;
-                }
-                
-                for (let i = 1; i < snake.length; i++) {
-                    if (head.x === snake[i].x && head.y === snake[i].y) {
-                        return true;
-                    }
-                }
-                
-                return false;
-            }
-
-            async function gameOver() {
-                gameRunning = false;
-                finalScoreEl.textContent = score;
-                finalLengthEl.textContent = snake.length;
-                gameOverEl.classList.remove('hidden');
-                
-                // Save score to database if user is logged in
-                {% if current_user.is_authenticated %}
-                try {
-                    const response = await fetch('/api/save_score', {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json',
-                        },
-                        body: JSON.stringify({
-                            score: score,
-                            snake_length: snake.length,
-                            foods_eaten: foodsEaten,
-                            game_speed: gameSpeed,
-                            canvas_size: canvasSize,
-                            grid_size: gridSize
-                        })
-                    });
-                    const data = await response.json();
-                    if (data.success) {
-                        console.log('Score saved successfully!');
-                    }
-                } catch (error) {
-                    console.error('Error saving score:', error);
-                }
-                {% endif %}
-            }
-
-            function restartGame() {
-                snake = [{x: Math.floor(tileCount / 2), y: Math.floor(tileCount / 2)}];
-                dx = 0;
-                dy = 0;
-                score = 0;
-                foodsEaten = 0;
-                baseSpeed = 5;
-                scoreEl.textContent = score;
-                foodsEatenEl.textContent = foodsEaten;
-                gameRunning = true;
-                gamePaused = false;
-                gameOverEl.classList.add('hidden');
-                updateSpeedDisplay();
-                calculateGameSpeed();
-                generateFood();
-                requestAnimationFrame(drawGame);
-            }
-
-            function pauseGame() {
-                gamePaused = !gamePaused;
-                document.getElementById('pauseBtn').textContent = gamePaused ? '▶️ Resume' : '⏸️ Pause';
-            }
-
-            function increaseSpeed() {
-                baseSpeed = Math.min(10, baseSpeed + 1);
-                updateSpeedDisplay();
-                calculateGameSpeed();
-            }
-
-            function decreaseSpeed() {
-                baseSpeed = Math.max(1, baseSpeed - 1);
-                updateSpeedDisplay();
-                calculateGameSpeed();
-            }
-
-            function updateSpeedDisplay() {
-                speedDisplayEl.textContent = baseSpeed;
-            }
-
-            function calculateGameSpeed() {
-                gameSpeed = Math.max(30, 200 - (baseSpeed * 15));
-                currentSpeedEl.textContent = gameSpeed + 'ms';
-            }
-
-            function changeGridSize() {
-                const newGridSize = parseInt(document.getElementById('gridSize').value);
-                gridSize = newGridSize;
-                tileCount = Math.floor(canvasSize / gridSize);
-                canvasSizeEl.textContent = canvasSize + 'x' + canvasSize;
-                gridInfoEl.textContent = tileCount + 'x' + tileCount;
-                restartGame();
-            }
-
-            function changePlaygroundSize() {
-                canvasSize = parseInt(document.getElementById('playgroundSize').value);
-                canvas.width = canvasSize;
-                canvas.height = canvasSize;
-                tileCount = Math.floor(canvasSize / gridSize);
-                canvasSizeEl.textContent = canvasSize + 'x' + canvasSize;
-                gridInfoEl.textContent = tileCount + 'x' + tileCount;
-                restartGame();
-            }
-
-            document.addEventListener('keydown', (e) => {
-                switch(e.key) {
-                    case 'ArrowUp':
-                    case 'w':
-                    case 'W':
-                        if (dy === 0) { dx = 0; dy = -1; }
-                        e.preventDefault();
-                        break;
-                    case 'ArrowDown':
-                    case 's':
-                    case 'S':
-                        if (dy === 0) { dx = 0; dy = 1; }
-                        e.preventDefault();
-                        break;
-                    case 'ArrowLeft':
-                    case 'a':
-                    case 'A':
-                        if (dx === 0) { dx = -1; dy = 0; }
-                        e.preventDefault();
-                        break;
-                    case 'ArrowRight':
-                    case 'd':
-                    case 'D':
-                        if (dx === 0) { dx = 1; dy = 0; }
-                        e.preventDefault();
-                        break;
-                    case ' ':
-                        pauseGame();
-                        e.preventDefault();
-                        break;
-                }
-            });
-
-            calculateGameSpeed();
-            requestAnimationFrame(drawGame);
-        </script>
+        <script src="{{ asset_url('game.js') }}"></script>
         """ + FOOTER_TEMPLATE + """
     </div>
 </body>
@@ -540,7 +1961,7 @@ REGISTER_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Register - Snake Game</title>
-    <script src="https://cdn.tailwindcss.com"></script>
+    """ + STYLESHEET_TEMPLATE + """
 </head>
 <body class="bg-gradient-to-br from-purple-600 via-pink-500 to-red-500 min-h-screen p-2 sm:p-4">
     <div class="max-w-md mx-auto mt-8 sm:mt-12 md:mt-20">
@@ -597,7 +2018,7 @@ LOGIN_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Login - Snake Game</title>
-    <script src="https://cdn.tailwindcss.com"></script>
+    """ + STYLESHEET_TEMPLATE + """
 </head>
 <body class="bg-gradient-to-br from-purple-600 via-pink-500 to-red-500 min-h-screen p-2 sm:p-4">
     <div class="max-w-md mx-auto mt-8 sm:mt-12 md:mt-20">
@@ -646,7 +2067,7 @@ DASHBOARD_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Dashboard - Snake Game</title>
-    <script src="https://cdn.tailwindcss.com"></script>
+    """ + STYLESHEET_TEMPLATE + """
 </head>
 <body class="bg-gradient-to-br from-purple-600 via-pink-500 to-red-500 min-h-screen p-2 sm:p-4">
     <div class="max-w-6xl mx-auto">
@@ -669,13 +2090,48 @@ DASHBOARD_TEMPLATE = """
                     <p class="text-white font-bold text-3xl">{{ average_score }}</p>
                 </div>
             </div>
-            
+
+            <!-- Analytics, filled in from /api/analytics -->
+            {% if total_games %}
+            <div id="analytics" class="bg-white/20 rounded-xl p-4 sm:p-6 mb-6 sm:mb-8">
+                <div class="flex flex-wrap justify-between items-baseline gap-2 mb-3 sm:mb-4">
+                    <h2 class="text-xl sm:text-2xl font-bold text-white">Analytics</h2>
+                    <span id="analyticsTrend" class="text-white/80 text-sm"></span>
+                </div>
+                <div class="grid grid-cols-1 md:grid-cols-2 gap-4 mb-4">
+                    <div>
+                        <p class="text-white/80 text-sm mb-2">Score distribution</p>
+                        <canvas id="histogramChart" class="w-full h-40 bg-white/10 rounded-lg"></canvas>
+                    </div>
+                    <div>
+                        <p id="movingAverageLabel" class="text-white/80 text-sm mb-2">Moving average</p>
+                        <canvas id="movingAverageChart" class="w-full h-40 bg-white/10 rounded-lg"></canvas>
+                    </div>
+                </div>
+                <div class="overflow-x-auto">
+                    <table class="w-full text-white">
+                        <thead>
+                            <tr class="border-b border-white/30">
+                                <th class="text-left py-2 px-4 text-sm">Speed</th>
+                                <th class="text-left py-2 px-4 text-sm">Grid</th>
+                                <th class="text-left py-2 px-4 text-sm">Size</th>
+                                <th class="text-left py-2 px-4 text-sm">Games</th>
+                                <th class="text-left py-2 px-4 text-sm">Best</th>
+                                <th class="text-left py-2 px-4 text-sm">Average</th>
+                            </tr>
+                        </thead>
+                        <tbody id="settingsRows"></tbody>
+                    </table>
+                </div>
+            </div>
+            {% endif %}
+
             <!-- Score History -->
             <div class="bg-white/20 rounded-xl p-4 sm:p-6">
                 <h2 class="text-xl sm:text-2xl font-bold text-white mb-3 sm:mb-4">Score History</h2>
                 {% if scores %}
                     <!-- Mobile Card View -->
-                    <div class="block md:hidden space-y-3">
+                    <div id="historyCards" class="block md:hidden space-y-3">
                         {% for score in scores %}
                         <div class="bg-white/10 rounded-lg p-4 border border-white/20">
                             <div class="flex justify-between items-center mb-2">
@@ -704,7 +2160,7 @@ DASHBOARD_TEMPLATE = """
                                     <th class="text-left py-3 px-4 text-sm">Size</th>
                                 </tr>
                             </thead>
-                            <tbody>
+                            <tbody id="historyRows">
                                 {% for score in scores %}
                                 <tr class="border-b border-white/20 hover:bg-white/10 transition-colors">
                                     <td class="py-3 px-4 text-sm">{{ score.played_at.strftime('%Y-%m-%d %H:%M:%S') }}</td>
@@ -718,6 +2174,13 @@ DASHBOARD_TEMPLATE = """
                             </tbody>
                         </table>
                     </div>
+                    {% if next_cursor %}
+                    <div class="mt-4 text-center">
+                        <button id="loadOlder" data-cursor="{{ next_cursor }}" onclick="loadOlderScores()" class="bg-white/20 hover:bg-white/30 text-white px-6 py-3 rounded-xl font-semibold transition-all text-sm sm:text-base min-h-[44px]">
+                            Load older games
+                        </button>
+                    </div>
+                    {% endif %}
                 {% else %}
                     <div class="text-center py-8">
                         <p class="text-white/80 text-lg mb-4">No games played yet!</p>
@@ -736,14 +2199,83 @@ DASHBOARD_TEMPLATE = """
         </div>
         """ + FOOTER_TEMPLATE + """
     </div>
+    <script src="{{ asset_url('dashboard.js') }}"></script>
 </body>
 </html>
 """
 
+# The game page only varies with the nav's auth state, so compile it once per
+# process and keep the rendered bytes for anonymous visitors and recent users.
+GAME_PAGE = app.jinja_env.from_string(GAME_TEMPLATE)
+GAME_PAGE_MAX_AGE = int(os.environ.get('GAME_PAGE_MAX_AGE', '60'))
+
+@lru_cache(maxsize=1024)
+def render_game_page(username):
+    nav_user = SimpleNamespace(is_authenticated=username is not None, username=username)
+    body = GAME_PAGE.render(current_user=nav_user).encode('utf-8')
+    return body, hashlib.sha256(body).hexdigest()[:32]
+
+# Static Assets
+# build_assets.py writes content-hashed files plus .gz/.br variants to
+# static/dist and lists them in manifest.json. Hashed names never change
+# content, so they are served as immutable. Without a build, the sources in
+# static/src are served as they are.
+ASSET_DIR = os.path.join(app.root_path, 'static', 'dist')
+ASSET_MAX_AGE = 365 * 24 * 3600
+ASSET_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+def load_asset_manifest():
+    try:
+        with open(os.path.join(ASSET_DIR, 'manifest.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+asset_manifest = load_asset_manifest()
+
+def asset_url(name, required=True):
+    if name in asset_manifest:
+        return f'/static/dist/{asset_manifest[name]}'
+    if not required:
+        return None
+    return f'/static/src/{name}'
+
+app.jinja_env.globals['asset_url'] = asset_url
+
+@app.route('/static/dist/<path:filename>')
+def dist_asset(filename):
+    path = safe_join(ASSET_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    accepted = request.accept_encodings
+    for encoding, suffix in ASSET_ENCODINGS:
+        if accepted[encoding] and os.path.isfile(path + suffix):
+            response = send_file(path + suffix, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_file(path, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response
+
 # Routes
 @app.route('/')
 def home():
-    return render_template_string(GAME_TEMPLATE)
+    username = current_user.username if current_user.is_authenticated else None
+    body, etag = render_game_page(username)
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    if username is None:
+        response.cache_control.public = True
+        response.cache_control.max_age = GAME_PAGE_MAX_AGE
+    else:
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -790,6 +2322,10 @@ def login():
         user = User.query.filter_by(username=username).first() or User.query.filter_by(email=username).first()
         
         if user and user.check_password(password):
+            if user.needs_rehash():
+                # Hash parameters changed since this password was stored
+                user.set_password(password)
+                db.session.commit()
             login_user(user)
             next_page = request.args.get('next')
             return redirect(next_page) if next_page else redirect(url_for('dashboard'))
@@ -808,43 +2344,601 @@ def logout():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    scores = Score.query.filter_by(user_id=current_user.id).order_by(Score.played_at.desc()).limit(50).all()
-    total_games = Score.query.filter_by(user_id=current_user.id).count()
-    
-    if total_games > 0:
-        highest_score = db.session.query(db.func.max(Score.score)).filter_by(user_id=current_user.id).scalar()
-        average_score = round(db.session.query(db.func.avg(Score.score)).filter_by(user_id=current_user.id).scalar(), 1)
-    else:
-        highest_score = 0
-        average_score = 0
+    scores, next_cursor = fetch_score_page(current_user.id)
+    stats = score_read_execute(db.select(UserStats).where(UserStats.user_id == current_user.id),
+                               current_user.id).scalar_one_or_none()
+    if stats is None:
+        stats = UserStats(games_played=0, best_score=0, score_sum=0)
     
     return render_template_string(DASHBOARD_TEMPLATE, 
                                  scores=scores,
-                                 total_games=total_games,
-                                 highest_score=highest_score,
-                                 average_score=average_score)
+                                 next_cursor=next_cursor,
+                                 total_games=stats.games_played,
+                                 highest_score=stats.best_score,
+                                 average_score=stats.average_score)
 
 @app.route('/api/save_score', methods=['POST'])
 @login_required
 def save_score():
     try:
         data = request.get_json()
-        score = Score(
-            user_id=current_user.id,
-            score=data.get('score', 0),
-            snake_length=data.get('snake_length', 0),
-            foods_eaten=data.get('foods_eaten', 0),
-            game_speed=data.get('game_speed', 100),
-            canvas_size=data.get('canvas_size', 400),
-            grid_size=data.get('grid_size', 20)
-        )
-        db.session.add(score)
-        db.session.commit()
+        row = {
+            'user_id': current_user.id,
+            'score': int(data.get('score', 0)),
+            'snake_length': int(data.get('snake_length', 0)),
+            'foods_eaten': int(data.get('foods_eaten', 0)),
+            'game_speed': int(data.get('game_speed', 100)),
+            'canvas_size': int(data.get('canvas_size', 400)),
+            'grid_size': int(data.get('grid_size', 20)),
+            'played_at': datetime.utcnow()
+        }
+        error = score_row_error(row)
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+        if data.get('replay'):
+            replay = base64.b64decode(data['replay'], validate=True)
+            if len(replay) > REPLAY_MAX_BYTES:
+                return jsonify({'success': False, 'message': 'Replay too large'}), 413
+            row['replay'] = replay
+        if SCORE_WRITE_MODE == 'batched':
+            try:
+                score_writer.submit(row)
+            except queue.Full:
+                return jsonify({'success': False, 'message': 'Server busy, please retry'}), 503, {'Retry-After': '1'}
+            return jsonify({'success': True, 'message': 'Score accepted'}), 202
+        persist_scores([row])
         return jsonify({'success': True, 'message': 'Score saved successfully'})
+    except OperationalError:
+        # Lock contention or an unavailable database: the client should retry
+        db.session.rollback()
+        app.logger.exception('Could not save score')
+        return jsonify({'success': False, 'message': 'Database busy, please retry'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 400
 
+@app.route('/api/scores')
+@login_required
+def score_history():
+    try:
+        limit = max(1, min(request.args.get('limit', HISTORY_PAGE_SIZE, type=int), HISTORY_MAX_PAGE))
+        before = request.args.get('before')
+        before = decode_history_cursor(before) if before else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+    rows, next_cursor = fetch_score_page(current_user.id, before, limit)
+    return jsonify({
+        'success': True,
+        'scores': [{'id': row.id, 'played_at': row.played_at.isoformat(), 'score': row.score,
+                    'snake_length': row.snake_length, 'foods_eaten': row.foods_eaten,
+                    'game_speed': row.game_speed, 'canvas_size': row.canvas_size,
+                    'grid_size': row.grid_size, 'verified': row.verified} for row in rows],
+        'next': next_cursor
+    })
+
+@app.route('/api/scores/export')
+@login_required
+def export_scores():
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': f'format must be one of {", ".join(EXPORT_FORMATS)}'}), 400
+    chunks = iter_score_chunks(current_user.id)
+    response = Response(format_score_chunks(chunks, fmt), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{current_user.username}-scores.{fmt}"'
+    response.cache_control.private = True
+    response.cache_control.no_store = True
+    return response
+
+@app.route('/api/analytics')
+@login_required
+def score_analytics_view():
+    return jsonify({'success': True, **score_analytics.get(current_user.id).summary()})
+
+@app.route('/api/feed')
+def live_records_feed():
+    listener = live_feed.subscribe()
+    if listener is None:
+        return jsonify({'success': False, 'message': 'Live feed unavailable'}), 503, {'Retry-After': '60'}
+    response = Response(live_feed_stream(listener), mimetype='text/event-stream')
+    response.cache_control.no_store = True
+    # Stop reverse proxies (ingress-nginx) from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def global_score_stats():
+    per_shard = fan_out(lambda index, conn: conn.execute(
+        db.select(db.func.count(), db.func.coalesce(db.func.sum(UserStats.games_played), 0),
+                  db.func.coalesce(db.func.max(UserStats.best_score), 0))
+    ).one())
+    return {
+        'players': sum(row[0] for row in per_shard),
+        'games': sum(row[1] for row in per_shard),
+        'best_score': max(row[2] for row in per_shard),
+    }
+
+@app.route('/api/stats')
+def score_stats():
+    return jsonify({'success': True, **global_score_stats()})
+
+# Leaderboard API
+def leaderboard_query_args():
+    period = request.args.get('period', 'all')
+    if period not in LEADERBOARD_PERIODS:
+        raise ValueError(f'period must be one of {", ".join(LEADERBOARD_PERIODS)}')
+    settings = [request.args.get(name, type=int) for name in ('grid_size', 'canvas_size', 'game_speed')]
+    if all(value is None for value in settings):
+        config = None
+    elif any(value is None for value in settings):
+        raise ValueError('grid_size, canvas_size and game_speed must be given together')
+    else:
+        config = tuple(settings)
+    return period, config
+
+@app.route('/api/leaderboard')
+def leaderboard_page():
+    try:
+        period, config = leaderboard_query_args()
+        limit = max(1, min(request.args.get('limit', 20, type=int), LEADERBOARD_MAX_PAGE))
+        after = request.args.get('after')
+        if after:
+            score, user_id = after.split(':')
+            after = (int(score), int(user_id))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    # One extra entry tells whether there is a next page
+    entries, total = leaderboard.page(period, config, after or None, limit + 1)
+    more = len(entries) > limit
+    entries = entries[:limit]
+    usernames = dict(read_execute(
+        db.select(User.id, User.username).where(User.id.in_([user_id for _, user_id, _ in entries]))
+    ).all()) if entries else {}
+    next_cursor = f'{entries[-1][2]}:{entries[-1][1]}' if more else None
+    return jsonify({
+        'success': True,
+        'period': period,
+        'total': total,
+        'entries': [{'rank': rank, 'user_id': user_id, 'username': usernames.get(user_id), 'score': score}
+                    for rank, user_id, score in entries],
+        'next': next_cursor
+    })
+
+@app.route('/api/leaderboard/me')
+@login_required
+def leaderboard_me():
+    try:
+        period, config = leaderboard_query_args()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    rank, score, total = leaderboard.rank(period, config, current_user.id)
+    return jsonify({'success': True, 'period': period, 'rank': rank, 'score': score, 'total': total})
+
+# Health Probes
+# /healthz only proves the worker can answer; /readyz also checks the database,
+# caching the result briefly so frequent probes do not each open a connection.
+READINESS_CACHE_SECONDS = float(os.environ.get('READINESS_CACHE_SECONDS', '2'))
+DRAIN_FILE = os.environ.get('DRAIN_FILE', '/tmp/snake-game-draining')
+readiness_state = {'checked_at': 0.0, 'ok': False, 'shutting_down': False}
+
+def install_sigterm_handler():
+    # Report not-ready from now on, then let gunicorn (or Python) shut down as usual.
+    # gunicorn.conf.py calls this again after a worker installs its own handlers,
+    # since with preload_app the import-time handler only lands in the master.
+    previous = signal.getsignal(signal.SIGTERM)
+    if getattr(previous, 'marks_not_ready', False):
+        return
+
+    def handle_sigterm(signum, frame):
+        readiness_state['shutting_down'] = True
+        if callable(previous):
+            previous(signum, frame)
+        elif previous == signal.SIG_DFL:
+            raise SystemExit(0)
+
+    handle_sigterm.marks_not_ready = True
+    try:
+        signal.signal(signal.SIGTERM, handle_sigterm)
+    except ValueError:
+        # Not in the main thread (e.g. imported by a threaded runner); rely on DRAIN_FILE
+        pass
+
+install_sigterm_handler()
+
+def database_ready():
+    now = time.monotonic()
+    if now - readiness_state['checked_at'] >= READINESS_CACHE_SECONDS:
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+            readiness_state['ok'] = True
+        except Exception:
+            readiness_state['ok'] = False
+        readiness_state['checked_at'] = now
+    return readiness_state['ok']
+
+@app.route('/healthz')
+def healthz():
+    return 'ok', 200, {'Content-Type': 'text/plain', 'Cache-Control': 'no-store'}
+
+@app.route('/readyz')
+def readyz():
+    headers = {'Content-Type': 'text/plain', 'Cache-Control': 'no-store'}
+    if readiness_state['shutting_down'] or os.path.exists(DRAIN_FILE):
+        return 'draining', 503, headers
+    if not database_ready():
+        return 'database unavailable', 503, headers
+    return 'ready', 200, headers
+
+# Schema Migrations
+# Each migration runs once, in order, and bumps the version stored in the
+# schema_version table. Append new steps; never edit ones that have shipped.
+def rebuild_user_stats(engines=None):
+    for engine in engines or score_engines():
+        totals = db.select(Score.user_id.label('user_id'), db.func.count(Score.id).label('games'),
+                           db.func.max(Score.score).label('best'), db.func.sum(Score.score).label('total'),
+                           db.func.max(Score.played_at).label('last')).group_by(Score.user_id)
+        # Migration 2 runs this before the rollup table exists
+        if inspect(engine).has_table(ScoreRollup.__tablename__):
+            totals = totals.union_all(
+                db.select(ScoreRollup.user_id, db.func.sum(ScoreRollup.games), db.func.max(ScoreRollup.best_score),
+                          db.func.sum(ScoreRollup.score_sum), db.func.max(ScoreRollup.last_played_at))
+                .group_by(ScoreRollup.user_id))
+        totals = totals.subquery()
+        with engine.begin() as conn:
+            conn.execute(db.delete(UserStats))
+            conn.execute(
+                db.insert(UserStats).from_select(
+                    ['user_id', 'games_played', 'best_score', 'score_sum', 'last_played_at'],
+                    db.select(totals.c.user_id, db.func.sum(totals.c.games), db.func.max(totals.c.best),
+                              db.func.sum(totals.c.total), db.func.max(totals.c.last))
+                    .group_by(totals.c.user_id)
+                )
+            )
+
+def run_ddl(engine, *statements):
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+
+# The DDL below is frozen as each version shipped, so a fresh database goes
+# through the same steps as an old one no matter how the models change later.
+# IF NOT EXISTS lets a step adopt tables an older build created with create_all.
+def migrate_initial_tables(engine):
+    # Shards hold only the per-user score tables
+    if engine is db.engine:
+        run_ddl(engine, """
+        CREATE TABLE IF NOT EXISTS user (
+            id INTEGER NOT NULL,
+            username VARCHAR(80) NOT NULL,
+            email VARCHAR(120) NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            created_at DATETIME,
+            PRIMARY KEY (id),
+            UNIQUE (username),
+            UNIQUE (email)
+        )""")
+    run_ddl(engine, """
+        CREATE TABLE IF NOT EXISTS score (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            snake_length INTEGER NOT NULL,
+            foods_eaten INTEGER NOT NULL,
+            game_speed INTEGER NOT NULL,
+            canvas_size INTEGER NOT NULL,
+            grid_size INTEGER NOT NULL,
+            played_at DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES user (id)
+        )""", """
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER NOT NULL,
+            games_played INTEGER NOT NULL,
+            best_score INTEGER NOT NULL,
+            score_sum BIGINT NOT NULL,
+            last_played_at DATETIME,
+            PRIMARY KEY (user_id),
+            FOREIGN KEY(user_id) REFERENCES user (id)
+        )""")
+
+def migrate_user_stats(engine):
+    rebuild_user_stats([engine])
+
+def migrate_score_user_indexes(engine):
+    run_ddl(engine,
+            'CREATE INDEX IF NOT EXISTS ix_score_user_played_at ON score (user_id, played_at DESC)',
+            'CREATE INDEX IF NOT EXISTS ix_score_user_score ON score (user_id, score DESC)')
+
+def migrate_score_played_at_index(engine):
+    run_ddl(engine, 'CREATE INDEX IF NOT EXISTS ix_score_played_at ON score (played_at)')
+
+def migrate_score_replays(engine):
+    # Tables created by create_all after this model change already have the column
+    if 'verified' not in {column['name'] for column in inspect(engine).get_columns('score')}:
+        run_ddl(engine, 'ALTER TABLE score ADD COLUMN verified BOOLEAN')
+    run_ddl(engine, """
+        CREATE TABLE IF NOT EXISTS score_replay (
+            score_id INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (score_id),
+            FOREIGN KEY(score_id) REFERENCES score (id)
+        )""")
+
+def migrate_score_rollups(engine):
+    run_ddl(engine, """
+        CREATE TABLE IF NOT EXISTS score_rollup (
+            user_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            grid_size INTEGER NOT NULL,
+            canvas_size INTEGER NOT NULL,
+            game_speed INTEGER NOT NULL,
+            games INTEGER NOT NULL,
+            score_sum BIGINT NOT NULL,
+            best_score INTEGER NOT NULL,
+            min_score INTEGER NOT NULL,
+            verified_games INTEGER NOT NULL,
+            rejected_games INTEGER NOT NULL,
+            last_played_at DATETIME,
+            PRIMARY KEY (user_id, day, grid_size, canvas_size, game_speed),
+            FOREIGN KEY(user_id) REFERENCES user (id)
+        )""")
+
+SCHEMA_MIGRATIONS = [
+    (1, 'create tables', migrate_initial_tables),
+    (2, 'backfill user_stats', migrate_user_stats),
+    (3, 'add score indexes', migrate_score_user_indexes),
+    (4, 'add score played_at index', migrate_score_played_at_index),
+    (5, 'add score replays and verified flag', migrate_score_replays),
+    (6, 'add score rollups', migrate_score_rollups),
+]
+
+def current_schema_version(engine=None):
+    with (engine or db.engine).begin() as conn:
+        conn.execute(text('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)'))
+        version = conn.execute(text('SELECT version FROM schema_version')).scalar()
+        if version is None:
+            conn.execute(text('INSERT INTO schema_version (version) VALUES (0)'))
+            version = 0
+    return version
+
+def upgrade_schema():
+    # Every database, main and shards alike, keeps its own version and runs
+    # the steps it has not seen, so a shard added later catches up on its own
+    applied = []
+    engines = [db.engine, *get_shard_engines()] if SCORE_SHARDS > 1 else [db.engine]
+    for engine in engines:
+        for version, description, migrate in SCHEMA_MIGRATIONS:
+            if version <= current_schema_version(engine):
+                continue
+            migrate(engine)
+            with engine.begin() as conn:
+                conn.execute(text('UPDATE schema_version SET version = :version WHERE version < :version'),
+                             {'version': version})
+            app.logger.info('Applied schema migration %d to %s: %s', version, engine.url.database, description)
+            applied.append((engine.url.database, version))
+    return applied
+
+@contextmanager
+def schema_lock():
+    # Serialises startup migrations when several processes import the app at
+    # once (gunicorn without preload_app, or several pods on one volume)
+    database = db.engine.url.database if db.engine.url.get_backend_name() == 'sqlite' else None
+    if not database or database == ':memory:':
+        yield
+        return
+    with open(f'{database}.migrate-lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def dispose_engines_after_fork():
+    # Pooled connections inherited from the gunicorn master must not be reused
+    # by workers; close=False leaves the master's own connections untouched
+    with app.app_context():
+        engines = {db.engine, storage['read_engine'], *(storage['shard_engines'] or [])}
+    for engine in engines:
+        if engine is not None:
+            engine.dispose(close=False)
+
+# CLI Commands
+@app.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Apply pending schema migrations."""
+    with schema_lock():
+        applied = upgrade_schema()
+    for database, version in applied:
+        print(f'Applied migration {version} to {database}')
+    if not applied:
+        print('Schema is up to date')
+    print(f'Schema version: {current_schema_version()}')
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the user_stats table from the score table."""
+    rebuild_user_stats()
+    print(f"Rebuilt stats for {global_score_stats()['players']} users")
+
+@app.cli.command('shard-scores')
+@click.option('--chunk-size', default=10000, show_default=True, help='Rows copied per transaction.')
+@click.option('--delete/--keep', default=False, help='Delete the rows from the main database once copied.')
+def shard_scores_command(chunk_size, delete):
+    """Move scores from the main database into the SCORE_SHARDS shard files."""
+    if SCORE_SHARDS < 2:
+        raise click.ClickException('Set SCORE_SHARDS to 2 or more first.')
+    # Creates the shard tables when AUTO_MIGRATE is off
+    with schema_lock():
+        upgrade_schema()
+    engines = get_shard_engines()
+    if any(fan_out(lambda index, conn: conn.execute(db.select(Score.id).limit(1)).first())):
+        raise click.ClickException('Shards already contain scores; refusing to copy twice.')
+    copied, last_id = 0, 0
+    # Ids are kept so stored replays stay attached to their scores
+    columns = list(Score.__table__.columns)
+    while True:
+        with db.engine.connect() as source:
+            rows = source.execute(
+                db.select(*columns).where(Score.id > last_id).order_by(Score.id).limit(chunk_size)
+            ).all()
+            replays = source.execute(
+                db.select(ScoreReplay.score_id, ScoreReplay.data)
+                .where(ScoreReplay.score_id > last_id, ScoreReplay.score_id <= rows[-1].id)
+            ).all() if rows else []
+        if not rows:
+            break
+        by_shard = {}
+        shard_of = {}
+        for row in rows:
+            shard_of[row.id] = shard_index(row.user_id)
+            by_shard.setdefault(shard_of[row.id], ([], []))[0].append(
+                {column.name: getattr(row, column.name) for column in columns})
+        for replay in replays:
+            by_shard[shard_of[replay.score_id]][1].append({'score_id': replay.score_id, 'data': replay.data})
+        for index, (shard_rows, shard_replays) in by_shard.items():
+            with engines[index].begin() as conn:
+                conn.execute(db.insert(Score), shard_rows)
+                if shard_replays:
+                    conn.execute(db.insert(ScoreReplay), shard_replays)
+        last_id = rows[-1].id
+        copied += len(rows)
+        print(f'Copied {copied} scores')
+    with db.engine.connect() as source:
+        rollups = [row._asdict() for row in source.execute(db.select(*ScoreRollup.__table__.columns))]
+    for index in range(SCORE_SHARDS):
+        shard_rollups = [row for row in rollups if shard_index(row['user_id']) == index]
+        if shard_rollups:
+            with engines[index].begin() as conn:
+                conn.execute(db.insert(ScoreRollup), shard_rollups)
+    rebuild_user_stats()
+    if delete:
+        with db.engine.begin() as conn:
+            conn.execute(db.delete(ScoreReplay).where(ScoreReplay.score_id <= last_id))
+            conn.execute(db.delete(Score).where(Score.id <= last_id))
+            conn.execute(db.delete(ScoreRollup))
+            conn.execute(db.delete(UserStats))
+    print(f'Moved {copied} scores into {SCORE_SHARDS} shards')
+
+@app.cli.command('score-stats')
+def score_stats_command():
+    """Print global score totals across all shards."""
+    totals = global_score_stats()
+    print(f"{totals['players']} players, {totals['games']} games, best score {totals['best_score']}")
+
+@app.cli.command('verify-replays')
+@click.option('--chunk-size', default=500, show_default=True, help='Replays loaded per batch.')
+def verify_replays_command(chunk_size):
+    """Verify stored replays whose scores are still unverified."""
+    counts = {True: 0, False: 0}
+    pool = replay_verifier.executor()
+    for engine in score_engines():
+        last_id = 0
+        while True:
+            with engine.connect() as conn:
+                rows = conn.execute(
+                    db.select(Score.id, ScoreReplay.data, *(getattr(Score, name) for name in REPLAY_CLAIMS))
+                    .join(ScoreReplay, ScoreReplay.score_id == Score.id)
+                    .where(Score.verified.is_(None), Score.id > last_id).order_by(Score.id).limit(chunk_size)
+                ).all()
+            if not rows:
+                break
+            jobs = [(row.id, row.data, {name: getattr(row, name) for name in REPLAY_CLAIMS}) for row in rows]
+            # Split the batch across the pool's processes
+            parts = [jobs[start::REPLAY_VERIFY_WORKERS] for start in range(REPLAY_VERIFY_WORKERS)]
+            results = [result for part in pool.map(verify_replays, parts) for result in part]
+            record_verification(engine, results)
+            for _, ok in results:
+                counts[ok] += 1
+            last_id = rows[-1].id
+    print(f'{counts[True]} verified, {counts[False]} rejected')
+
+@app.cli.command('seed-scores')
+@click.option('--users', default=1000, show_default=True, help='Load-test users to create (loadtest-00001, ...).')
+@click.option('--games', default=100000, show_default=True, help='Simulated games to insert.')
+@click.option('--days', default=30, show_default=True, help='Spread played_at over this many past days.')
+@click.option('--password', default='loadtest', show_default=True, help='Password shared by the load-test users.')
+@click.option('--workers', default=os.cpu_count(), show_default=True, help='Simulator processes.')
+@click.option('--seed', type=int, default=None, help='Random seed for a reproducible data set.')
+def seed_scores_command(users, games, days, password, workers, seed):
+    """Fill the database with simulated players and games for scale tests."""
+    names = [f'loadtest-{i:05d}' for i in range(1, users + 1)]
+    existing = set(db.session.scalars(db.select(User.username).where(User.username.like('loadtest-%'))))
+    # Hash once; every load-test user shares the password
+    password_hash = password_hasher.hash(password)
+    missing = [{'username': name, 'email': f'{name}@example.com', 'password_hash': password_hash,
+                'created_at': datetime.utcnow()} for name in names if name not in existing]
+    if missing:
+        db.session.execute(db.insert(User), missing)
+        db.session.commit()
+    user_ids = list(db.session.scalars(db.select(User.id).where(User.username.in_(names))))
+    print(f'{len(missing)} users created, {len(user_ids)} load-test users in total')
+
+    end = datetime.utcnow()
+    inserted = 0
+    for rows in generate_scores(games, user_ids, end - timedelta(days=days), end, seed=seed, workers=workers):
+        persist_scores(rows)
+        inserted += len(rows)
+        print(f'Inserted {inserted} scores')
+
+@app.cli.command('export-scores')
+@click.option('--format', 'fmt', type=click.Choice(list(EXPORT_FORMATS)), default='ndjson', show_default=True)
+@click.option('--user', 'username', default=None, help='Only this player\'s scores.')
+@click.option('--output', type=click.File('w'), default='-', help='File to write (default: stdout).')
+@click.option('--chunk-size', default=EXPORT_CHUNK_SIZE, show_default=True, help='Rows read per query.')
+def export_scores_command(fmt, username, output, chunk_size):
+    """Stream scores (all players, or one) as NDJSON or CSV."""
+    user_id = None
+    if username is not None:
+        user_id = db.session.scalar(db.select(User.id).where(User.username == username))
+        if user_id is None:
+            raise click.ClickException(f'No user named {username}')
+    for text in format_score_chunks(iter_score_chunks(user_id, chunk_size), fmt):
+        output.write(text)
+
+@app.cli.command('import-scores')
+@click.argument('source', type=click.File('r'))
+@click.option('--format', 'fmt', type=click.Choice(list(EXPORT_FORMATS)), default=None,
+              help='Input format (default: from the file extension, else ndjson).')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows inserted per transaction.')
+def import_scores_command(source, fmt, batch_size):
+    """Insert scores from an export-scores file, matching players by username.
+
+    Scores get new ids. Rows without a username, for players that do not
+    exist here, with bad values or already imported are skipped.
+    """
+    fmt = fmt or ('csv' if source.name.endswith('.csv') else 'ndjson')
+    read, outcome, batch = 0, dict.fromkeys(IMPORT_OUTCOMES, 0), []
+    for record in parse_score_records(source, fmt):
+        batch.append(record)
+        if len(batch) == batch_size:
+            for name, count in import_score_batch(batch).items():
+                outcome[name] += count
+            read += len(batch)
+            batch = []
+            print(f'Imported {outcome["inserted"]} of {read} scores')
+    if batch:
+        for name, count in import_score_batch(batch).items():
+            outcome[name] += count
+        read += len(batch)
+    skipped = ', '.join(f'{outcome[reason]} {label}' for reason, label in (
+        ('duplicate', 'already present'), ('unknown_player', 'for unknown players'),
+        ('no_username', 'without a username'), ('invalid', 'invalid')) if outcome[reason])
+    print(f'Imported {outcome["inserted"]} of {read} scores' + (f' (skipped {skipped})' if skipped else ''))
+
+@app.cli.command('compact-scores')
+@click.option('--days', type=int, default=None, help='Retention window (default: SCORE_RETENTION_DAYS).')
+@click.option('--batch-size', default=SCORE_COMPACT_BATCH, show_default=True, help='Scores per transaction.')
+def compact_scores_command(days, batch_size):
+    """Roll scores older than the retention window into daily rollups."""
+    days = SCORE_RETENTION_DAYS if days is None else days
+    if days <= 0:
+        raise click.ClickException('Set SCORE_RETENTION_DAYS or pass --days.')
+    with compaction_lock() as acquired:
+        if not acquired:
+            raise click.ClickException('Another process is compacting scores right now.')
+        compacted = compact_scores(days, batch_size)
+    print(f'Rolled up {compacted} scores played before {retention_cutoff(days):%Y-%m-%d}')
+
 # Initialize database
 with app.app_context():
     # Ensure data directory exists for database
@@ -858,7 +2952,10 @@ with app.app_context():
             os.makedirs(db_dir, exist_ok=True)
             # Set permissions to ensure writable
             os.chmod(db_dir, 0o755)
-    db.create_all()
+    # Runs once in the gunicorn master when preload_app is on (see gunicorn.conf.py)
+    if os.environ.get('AUTO_MIGRATE', 'true').lower() == 'true':
+        with schema_lock():
+            upgrade_schema()
 
 if __name__ == '__main__':
     # Development server - use Gunicorn in production (see Dockerfile)
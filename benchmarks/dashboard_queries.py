@@ -0,0 +1,99 @@
+"""Dashboard query cost with and without the Score indexes.
+
+Seeds a throwaway SQLite file per row count, times the dashboard history
+query and the per-user aggregates, then adds the indexes from migration 3
+and times them again.
+
+    python benchmarks/dashboard_queries.py --rows 10000 1000000 10000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['AUTO_MIGRATE'] = 'false'
+
+from sqlalchemy import create_engine, func, select, text  # noqa: E402
+
+from app import Score, User  # noqa: E402
+
+CHUNK = 100_000
+
+
+def seed(engine, rows, users):
+    User.__table__.create(engine)
+    Score.__table__.create(engine)
+    for index in Score.__table__.indexes:
+        index.drop(engine)
+    now = datetime.utcnow()
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.executemany('INSERT INTO user (id, username, email, password_hash, created_at) VALUES (?, ?, ?, ?, ?)',
+                        [(i, f'user{i}', f'user{i}@example.com', '-', now) for i in range(1, users + 1)])
+        for start in range(0, rows, CHUNK):
+            batch = []
+            for i in range(start, min(start + CHUNK, rows)):
+                foods = random.randint(0, 60)
+                batch.append((random.randint(1, users), foods, foods + 1, foods, random.choice((50, 80, 110, 140)),
+                              random.choice((300, 400, 500, 600, 700)), random.choice((10, 15, 20, 25)),
+                              now - timedelta(seconds=rows - i)))
+            cur.executemany('INSERT INTO score (user_id, score, snake_length, foods_eaten, game_speed, '
+                            'canvas_size, grid_size, played_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', batch)
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def dashboard_queries(user_id):
+    history = (select(Score).where(Score.user_id == user_id)
+               .order_by(Score.played_at.desc()).limit(50))
+    aggregates = (select(func.count(Score.id), func.max(Score.score), func.avg(Score.score))
+                  .where(Score.user_id == user_id))
+    return {'history': history, 'aggregates': aggregates}
+
+
+def measure(engine, users, repeat):
+    timings = {}
+    with engine.connect() as conn:
+        for name, query in dashboard_queries(1).items():
+            plan = conn.execute(text('EXPLAIN QUERY PLAN ' + str(query.compile(engine,
+                                compile_kwargs={'literal_binds': True})))).fetchall()
+            elapsed = 0.0
+            for _ in range(repeat):
+                stmt = dashboard_queries(random.randint(1, users))[name]
+                start = time.perf_counter()
+                conn.execute(stmt).fetchall()
+                elapsed += time.perf_counter() - start
+            timings[name] = (elapsed / repeat * 1000, plan[-1][-1])
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f'{"rows":>10}  {"query":<10}  {"before ms":>10}  {"after ms":>10}  plan after')
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f'sqlite:///{os.path.join(tmp, "bench.db")}')
+            seed(engine, rows, args.users)
+            before = measure(engine, args.users, args.repeat)
+            for index in Score.__table__.indexes:
+                index.create(engine)
+            after = measure(engine, args.users, args.repeat)
+            engine.dispose()
+        for name in before:
+            print(f'{rows:>10}  {name:<10}  {before[name][0]:>10.2f}  {after[name][0]:>10.2f}  {after[name][1]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""End-to-end load test of the app running under Gunicorn.
+
+Seeds a throwaway SQLite database with simulated players and games (flask
+seed-scores), starts Gunicorn with gunicorn.conf.py on a free local port and
+drives a weighted mix of anonymous page views, sign-ups, logins, score saves
+and dashboard loads from concurrent clients, each with its own session.
+Prints throughput and p50/p95/p99 latency per route. --save writes the run
+as a JSON baseline; --baseline compares against one and exits with status 1
+when a route got slower or served less than the baseline allows.
+
+    python benchmarks/load_test.py --clients 16 --seconds 30 --save baseline.json
+    python benchmarks/load_test.py --clients 16 --seconds 30 --baseline baseline.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from simulator import generate_scores  # noqa: E402
+
+PASSWORD = 'loadtest'
+DEFAULT_MIX = 'home=35,save_score=35,dashboard=20,login=7,register=3'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Client:
+    """One browser: a cookie jar and a fresh connection per request."""
+
+    def __init__(self, port):
+        self.port = port
+        self.cookies = {}
+
+    def request(self, method, path, form=None, payload=None):
+        headers = {}
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif payload is not None:
+            body = json.dumps(payload)
+            headers['Content-Type'] = 'application/json'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        try:
+            conn.request(method, path, body, headers)
+            response = conn.getresponse()
+            response.read()
+        finally:
+            conn.close()
+        for header in response.headers.get_all('Set-Cookie') or ():
+            name, _, value = header.split(';', 1)[0].partition('=')
+            self.cookies[name] = value
+        return response.status
+
+    def login(self, username):
+        return self.request('POST', '/login', form={'username': username, 'password': PASSWORD})
+
+
+class Workload:
+    def __init__(self, port, usernames, payloads):
+        self.port = port
+        self.usernames = usernames
+        self.payloads = payloads
+        self.counter = iter(range(10 ** 9))
+        self.lock = threading.Lock()
+
+    def home(self, client):
+        return Client(self.port).request('GET', '/')
+
+    def register(self, client):
+        with self.lock:
+            name = f'bench-{os.getpid()}-{next(self.counter)}'
+        return Client(self.port).request('POST', '/register', form={
+            'username': name, 'email': f'{name}@example.com', 'password': PASSWORD, 'confirm_password': PASSWORD})
+
+    def login(self, client):
+        return Client(self.port).login(random.choice(self.usernames))
+
+    def save_score(self, client):
+        return client.request('POST', '/api/save_score', payload=random.choice(self.payloads))
+
+    def dashboard(self, client):
+        return client.request('GET', '/dashboard')
+
+
+def percentile(ordered, fraction):
+    # Nearest-rank percentile of an already sorted list
+    return ordered[max(0, int(round(fraction * len(ordered) + 0.5)) - 1)] if ordered else None
+
+
+def drive(workload, mix, clients, seconds, warmup):
+    routes, weights = zip(*mix.items())
+    samples = []
+    start_barrier = threading.Barrier(clients)
+    started = {}
+
+    def run():
+        client = Client(workload.port)
+        while (status := client.login(random.choice(workload.usernames))) == 503:
+            time.sleep(0.5)
+        if status != 302:
+            raise SystemExit(f'Login as a seeded user failed with HTTP {status}')
+        start_barrier.wait()
+        started.setdefault('at', time.monotonic())
+        measure_from = started['at'] + warmup
+        deadline = measure_from + seconds
+        local = []
+        while True:
+            route = random.choices(routes, weights)[0]
+            began = time.monotonic()
+            if began >= deadline:
+                break
+            try:
+                status = getattr(workload, route)(client)
+            except OSError:
+                status = 0
+            if began >= measure_from:
+                local.append((route, time.monotonic() - began, status))
+        samples.extend(local)
+
+    threads = [threading.Thread(target=run) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    results = {}
+    for route in routes:
+        latencies = sorted(latency * 1000 for name, latency, _ in samples if name == route)
+        statuses = [status for name, _, status in samples if name == route]
+        results[route] = {
+            'requests': len(latencies),
+            'throughput': round(len(latencies) / seconds, 1),
+            'errors': sum(1 for status in statuses if status == 0 or (status >= 400 and status != 503)),
+            'rejected': statuses.count(503),
+            'p50_ms': round(percentile(latencies, 0.50), 2) if latencies else None,
+            'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+            'p99_ms': round(percentile(latencies, 0.99), 2) if latencies else None,
+        }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages against a saved baseline."""
+    regressions = []
+    for route, base in baseline['routes'].items():
+        current = results.get(route)
+        if not current or not current['requests']:
+            continue
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if base.get(key) and current[key] > base[key] * (1 + tolerance):
+                regressions.append(f'{route}: {key} {current[key]} > baseline {base[key]}')
+        if base['throughput'] and current['throughput'] < base['throughput'] * (1 - tolerance):
+            regressions.append(f'{route}: throughput {current["throughput"]}/s < baseline {base["throughput"]}/s')
+        base_rate = base['errors'] / max(base['requests'], 1)
+        if current['errors'] / current['requests'] > base_rate + 0.01:
+            regressions.append(f'{route}: {current["errors"]} errors in {current["requests"]} requests')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=200, help='Seeded load-test users.')
+    parser.add_argument('--games', type=int, default=20000, help='Seeded games.')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent clients.')
+    parser.add_argument('--seconds', type=float, default=30, help='Measured duration.')
+    parser.add_argument('--warmup', type=float, default=5, help='Unmeasured seconds before measuring.')
+    parser.add_argument('--workers', type=int, default=None, help='GUNICORN_WORKERS (default: sized from cgroups).')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Route weights, e.g. "home=35,save_score=35,...".')
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE',
+                        help='Extra environment for the app, e.g. SCORE_WRITE_MODE=batched.')
+    parser.add_argument('--save', metavar='FILE', help='Write the results as a JSON baseline.')
+    parser.add_argument('--baseline', metavar='FILE', help='Compare against a saved baseline.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown before flagging (0.2 = 20%%).')
+    args = parser.parse_args()
+    mix = {route: float(weight) for route, weight in (item.split('=') for item in args.mix.split(','))}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{tmp}/app.db', PROMETHEUS_MULTIPROC_DIR=f'{tmp}/metrics',
+                   HASH_SLOT_DIR=f'{tmp}/hash-slots', DRAIN_FILE=f'{tmp}/draining', GUNICORN_BIND=f'127.0.0.1:{port}')
+        env.update(item.split('=', 1) for item in args.env)
+        if args.workers:
+            env['GUNICORN_WORKERS'] = str(args.workers)
+        for name in ('PROMETHEUS_MULTIPROC_DIR', 'HASH_SLOT_DIR'):
+            os.makedirs(env[name], exist_ok=True)
+
+        print(f'Seeding {args.users} users and {args.games} games...')
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'seed-scores', '--users', str(args.users),
+                        '--games', str(args.games), '--password', PASSWORD, '--seed', '1'],
+                       cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+        usernames = [f'loadtest-{i:05d}' for i in range(1, args.users + 1)]
+        payloads = [{key: value for key, value in row.items() if key not in ('user_id', 'played_at')}
+                    for row in next(generate_scores(1000, [0], seed=2))]
+
+        log_path = os.path.join(tmp, 'gunicorn.log')
+        with open(log_path, 'w') as log:
+            server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'app:app'],
+                                      cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    if Client(port).request('GET', '/readyz') == 200:
+                        break
+                except OSError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    with open(log_path) as log:
+                        sys.exit('Gunicorn did not become ready:\n' + log.read())
+                time.sleep(0.2)
+
+            print(f'Driving {args.clients} clients for {args.seconds:g}s (+{args.warmup:g}s warm-up)...')
+            results = drive(Workload(port, usernames, payloads), mix, args.clients, args.seconds, args.warmup)
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+
+    print(f'{"route":<12} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7} {"503s":>6}')
+    for route, row in results.items():
+        print(f'{route:<12} {row["throughput"]:>8} {row["p50_ms"]!s:>8} {row["p95_ms"]!s:>8} {row["p99_ms"]!s:>8} '
+              f'{row["errors"]:>7} {row["rejected"]:>6}')
+    run = {'config': {key: getattr(args, key) for key in ('users', 'games', 'clients', 'seconds', 'workers', 'mix', 'env')},
+           'routes': results}
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f'Saved baseline to {args.save}')
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['config'] != run['config']:
+            print('Warning: baseline was recorded with different settings:', baseline['config'])
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print('REGRESSION', message)
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions beyond {args.tolerance:.0%} of the baseline')
+
+
+if __name__ == '__main__':
+    main()
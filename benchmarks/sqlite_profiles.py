@@ -0,0 +1,127 @@
+"""Concurrent read/write throughput for each SQLite storage profile.
+
+Starts writer processes that save scores the way persist_scores() does
+(insert plus user_stats update in one transaction) alongside reader
+processes running the dashboard queries, much like Gunicorn workers
+sharing one database file.
+
+    python benchmarks/sqlite_profiles.py --writers 4 --readers 4 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['AUTO_MIGRATE'] = 'false'
+
+from sqlalchemy import create_engine  # noqa: E402
+
+from app import SQLITE_PROFILES, apply_sqlite_profile, db  # noqa: E402
+
+USERS = 200
+
+
+def connect(path, profile, read_only=False):
+    if read_only:
+        conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, isolation_level=None)
+    else:
+        conn = sqlite3.connect(path, isolation_level=None)
+    apply_sqlite_profile(conn, profile)
+    return conn
+
+
+def writer(path, profile, seconds, results):
+    conn = connect(path, profile)
+    done = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        user_id = random.randint(1, USERS)
+        score = random.randint(0, 60)
+        try:
+            conn.execute('BEGIN')
+            conn.execute('INSERT INTO score (user_id, score, snake_length, foods_eaten, game_speed, canvas_size, '
+                         'grid_size, played_at) VALUES (?, ?, ?, ?, 110, 400, 20, ?)',
+                         (user_id, score, score + 1, score, datetime.utcnow()))
+            conn.execute('UPDATE user_stats SET games_played = games_played + 1, score_sum = score_sum + ?, '
+                         'best_score = MAX(best_score, ?) WHERE user_id = ?', (score, score, user_id))
+            conn.execute('COMMIT')
+            done += 1
+        except sqlite3.OperationalError:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            errors += 1
+    results.put(('write', done, errors))
+
+
+def reader(path, profile, seconds, results):
+    conn = connect(path, profile, read_only=True)
+    done = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        user_id = random.randint(1, USERS)
+        try:
+            conn.execute('SELECT id, played_at, score, snake_length, foods_eaten, game_speed, canvas_size, grid_size '
+                         'FROM score WHERE user_id = ? ORDER BY played_at DESC, id DESC LIMIT 51',
+                         (user_id,)).fetchall()
+            conn.execute('SELECT * FROM user_stats WHERE user_id = ?', (user_id,)).fetchone()
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    results.put(('read', done, errors))
+
+
+def run_profile(profile, writers, readers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        engine = create_engine(f'sqlite:///{path}')
+        db.metadata.create_all(engine)
+        engine.dispose()
+        conn = connect(path, profile)
+        now = datetime.utcnow()
+        conn.executemany('INSERT INTO user (id, username, email, password_hash, created_at) VALUES (?, ?, ?, ?, ?)',
+                         [(i, f'user{i}', f'user{i}@example.com', '-', now) for i in range(1, USERS + 1)])
+        conn.executemany('INSERT INTO user_stats (user_id, games_played, best_score, score_sum) VALUES (?, 0, 0, 0)',
+                         [(i,) for i in range(1, USERS + 1)])
+        conn.close()
+
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=writer, args=(path, profile, seconds, results))
+                 for _ in range(writers)]
+        procs += [multiprocessing.Process(target=reader, args=(path, profile, seconds, results))
+                  for _ in range(readers)]
+        for proc in procs:
+            proc.start()
+        totals = {'write': [0, 0], 'read': [0, 0]}
+        for _ in procs:
+            kind, done, errors = results.get()
+            totals[kind][0] += done
+            totals[kind][1] += errors
+        for proc in procs:
+            proc.join()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', nargs='+', default=list(SQLITE_PROFILES))
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    print(f'{"profile":<8}  {"writes/s":>9}  {"write errs":>10}  {"reads/s":>9}  {"read errs":>9}')
+    for profile in args.profiles:
+        totals = run_profile(profile, args.writers, args.readers, args.seconds)
+        print(f'{profile:<8}  {totals["write"][0] / args.seconds:>9.0f}  {totals["write"][1]:>10}  '
+              f'{totals["read"][0] / args.seconds:>9.0f}  {totals["read"][1]:>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Build the static assets served from static/dist.
+
+Compiles a purged, minified Tailwind stylesheet from the classes used in
+app.py, copies the page scripts, names every file after its content hash
+and writes gzip (and, when the brotli package is installed, brotli)
+variants next to it. app.py reads static/dist/manifest.json to link them.
+
+    python build_assets.py
+
+The Tailwind standalone CLI must be on PATH (or set TAILWIND_BIN); the
+Dockerfile downloads it in its assets stage.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(ROOT, 'static', 'src')
+DIST_DIR = os.path.join(ROOT, 'static', 'dist')
+SCRIPTS = ('game.js', 'dashboard.js')
+
+
+def build_css(output):
+    tailwind = os.environ.get('TAILWIND_BIN') or shutil.which('tailwindcss')
+    if tailwind is None:
+        raise SystemExit('tailwindcss not found; install the standalone CLI or set TAILWIND_BIN')
+    subprocess.run([tailwind, '--config', os.path.join(ROOT, 'tailwind.config.js'),
+                    '--input', os.path.join(SOURCE_DIR, 'app.css'), '--output', output, '--minify'],
+                   check=True, cwd=ROOT)
+
+
+def publish(name, data):
+    base, ext = os.path.splitext(name)
+    filename = f'{base}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+    path = os.path.join(DIST_DIR, filename)
+    with open(path, 'wb') as f:
+        f.write(data)
+    # mtime=0 keeps the gzip bytes reproducible between builds
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+    return filename
+
+
+def main():
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    os.makedirs(DIST_DIR)
+    manifest = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        css_path = os.path.join(tmp, 'app.css')
+        build_css(css_path)
+        with open(css_path, 'rb') as f:
+            manifest['app.css'] = publish('app.css', f.read())
+    for name in SCRIPTS:
+        with open(os.path.join(SOURCE_DIR, name), 'rb') as f:
+            manifest[name] = publish(name, f.read())
+    with open(os.path.join(DIST_DIR, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    for name, filename in sorted(manifest.items()):
+        print(f'{name} -> static/dist/{filename}')
+
+
+if __name__ == '__main__':
+    main()
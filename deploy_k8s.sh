@@ -59,6 +59,7 @@ function start {
 
     echo "[INFO] Waiting for rollout to complete..."
     kubectl rollout status deployment/snake-game
+    kubectl rollout status deployment/snake-game-feed
 
     echo "[INFO] Deployment complete."
     
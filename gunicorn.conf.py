@@ -0,0 +1,130 @@
+# Gunicorn configuration (loaded automatically from the working directory)
+#
+# Workers and threads are sized from the container's cgroup CPU quota and
+# memory limit rather than the node's core count. Every setting can be
+# overridden with the GUNICORN_* environment variables below.
+import math
+import os
+import shutil
+import sys
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+if worker_class == 'gevent':
+    # Patch before anything (prometheus_client here, app.py via preload_app)
+    # creates locks or threads, or they would block the whole worker
+    from gevent import monkey
+    monkey.patch_all()
+
+# Shared directory for prometheus_client multiprocess mode. It must be set
+# before prometheus_client is first imported (here, or by app.py) because the
+# library picks its storage backend at import time.
+prometheus_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus_multiproc')
+os.makedirs(prometheus_dir, exist_ok=True)
+
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def read_cgroup_file(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit():
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    cpu_max = read_cgroup_file('/sys/fs/cgroup/cpu.max')
+    if cpu_max:
+        quota, period = cpu_max.split()
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    # cgroup v1
+    quota = read_cgroup_file('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+    period = read_cgroup_file('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def cgroup_memory_limit():
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        value = read_cgroup_file(path)
+        # v1 reports "no limit" as a huge number close to 2**63
+        if value and value != 'max' and int(value) < 2 ** 60:
+            return int(value)
+    return None
+
+
+cpus = cgroup_cpu_limit() or len(os.sched_getaffinity(0))
+memory = cgroup_memory_limit()
+worker_memory = int(os.environ.get('GUNICORN_WORKER_MEMORY_MB', '96')) * 1024 * 1024
+
+if worker_class == 'gthread':
+    # Threads cover I/O waits, so one process per CPU (plus one) is enough
+    default_workers = math.ceil(cpus) + 1
+    threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+elif worker_class == 'gevent':
+    # Greenlets cover I/O waits and idle live-feed streams
+    default_workers = math.ceil(cpus) + 1
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '1000'))
+else:
+    default_workers = 2 * math.ceil(cpus) + 1
+if memory:
+    default_workers = min(default_workers, max(1, memory // worker_memory))
+workers = int(os.environ.get('GUNICORN_WORKERS', default_workers))
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+# Time in-flight requests get to finish after SIGTERM (keep below the pod's
+# terminationGracePeriodSeconds minus the preStop sleep)
+graceful_timeout = 30
+# Heartbeat files on tmpfs so a slow container filesystem cannot stall workers
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Import app.py once in the master: templates and code are shared copy-on-write
+# and schema migrations run once instead of in every worker
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Recycle workers periodically, staggered so they do not all restart together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+
+def on_starting(server):
+    # Start every master with a clean metrics directory so stale samples from a
+    # previous container run are not merged into the new totals. Workers forked
+    # later open fresh files under their own pid.
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+    # A drain marker left by a previous preStop hook would keep /readyz failing
+    drain_file = os.environ.get('DRAIN_FILE', '/tmp/snake-game-draining')
+    if os.path.exists(drain_file):
+        os.remove(drain_file)
+    server.log.info('Sizing for %.2f CPUs, %s memory: %d %s workers', cpus,
+                    f'{memory // (1024 * 1024)}Mi' if memory else 'unlimited', workers, worker_class)
+
+
+def post_fork(server, worker):
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        app_module.dispose_engines_after_fork()
+
+
+def post_worker_init(worker):
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        app_module.install_sigterm_handler()
+        app_module.score_compactor.start()
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    # Commit any scores still queued by the batched writer before the worker dies
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        app_module.score_writer.flush()
@@ -0,0 +1,438 @@
+"""Headless batch simulator of the snake game rules.
+
+Implements the rules of moveSnake/checkCollision/generateFood in
+static/src/game.js with NumPy, so thousands of games advance in lock-step
+with one array operation per rule per tick. Each game is steered by a
+simple player model: it greedily heads for the food, avoids walls and its
+own body according to a per-game skill level, and makes more mistakes at
+higher speeds. Used to seed scale-test databases (``flask seed-scores``)
+and to produce realistic save_score payloads for load tests.
+
+    python simulator.py --games 100000 --workers 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Settings offered on the game page and how often players pick them
+CANVAS_SIZES = (300, 400, 500, 600, 700)
+CANVAS_WEIGHTS = (0.15, 0.45, 0.2, 0.12, 0.08)
+GRID_SIZES = (10, 15, 20, 25)
+GRID_WEIGHTS = (0.1, 0.2, 0.5, 0.2)
+DEFAULT_BASE_SPEED = 5
+BASE_SPEEDS = tuple(range(1, 11))
+BASE_SPEED_WEIGHTS = (0.02, 0.03, 0.05, 0.1, 0.5, 0.1, 0.08, 0.05, 0.04, 0.03)
+AUTO_SPEED_SHARE = 0.8
+
+# Columns of a Score row the simulator fills in (user_id and played_at are assigned)
+SCORE_COLUMNS = ('score', 'snake_length', 'foods_eaten', 'game_speed', 'canvas_size', 'grid_size')
+SIMULATION_CHUNK = 10000
+LARGE_BOARD_TILES = 35
+
+# Games still running after this many ticks are stopped (a snake can circle forever)
+MAX_TICKS = 20000
+# Chance per tick that a zero-skill player at the default speed steers at random
+MISTAKE_RATE = 0.03
+
+# Right, left, down, up, and the index of each one's opposite
+DIRECTIONS = np.array([[1, 0], [-1, 0], [0, 1], [0, -1]])
+REVERSE = np.array([1, 0, 3, 2])
+HORIZONTAL = np.array([True, True, False, False])
+
+
+def game_speed(base_speed):
+    """Milliseconds per tick for a speed setting, as calculateGameSpeed() computes it."""
+    return np.maximum(30, 200 - np.asarray(base_speed) * 15)
+
+
+def neighbour_table(tiles):
+    """Cell reached from each cell of a ``tiles`` board in each direction, or -1 past a wall."""
+    x, y = np.meshgrid(np.arange(tiles), np.arange(tiles))
+    nx = x.reshape(-1, 1) + DIRECTIONS[:, 0]
+    ny = y.reshape(-1, 1) + DIRECTIONS[:, 1]
+    inside = (nx >= 0) & (nx < tiles) & (ny >= 0) & (ny < tiles)
+    return np.where(inside, ny * tiles + nx, -1)
+
+
+def spawn_food(occupied, rows, cells, rng):
+    """Pick a uniformly random free cell for each of ``rows``; -1 when its board is full.
+
+    Rejection sampling touches one cell per attempt, so it stays cheap until a
+    board is nearly full; rows still unresolved after a few rounds fall back
+    to scanning their free cells.
+    """
+    food = np.full(len(rows), -1)
+    pending = np.arange(len(rows))
+    for _ in range(8):
+        guess = (rng.random(len(pending)) * cells[pending]).astype(np.int64)
+        hit = ~occupied[rows[pending], guess]
+        food[pending[hit]] = guess[hit]
+        pending = pending[~hit]
+        if not len(pending):
+            return food
+    free = ~occupied[rows[pending]]
+    counts = free.sum(axis=1)
+    picks = (rng.random(len(pending)) * counts).astype(np.int64)
+    scanned = np.argmax(np.cumsum(free, axis=1) > picks[:, None], axis=1)
+    food[pending] = np.where(counts > 0, scanned, -1)
+    return food
+
+
+def simulate(games, canvas_size=400, grid_size=20, base_speed=DEFAULT_BASE_SPEED, auto_speed=True,
+             skill=None, seed=None):
+    """Play ``games`` games until each one crashes.
+
+    The settings may be scalars or per-game arrays; games on different board
+    sizes share one padded board array, so mixing very different sizes
+    wastes memory. ``skill`` is a per-game array in [0, 1] (drawn from a
+    Beta distribution when omitted). Returns a dict of per-game arrays with
+    the columns save_score records plus ``ticks`` and ``duration_ms``.
+    """
+    rng = np.random.default_rng(seed)
+    canvas_size = np.array(np.broadcast_to(canvas_size, games))
+    grid_size = np.array(np.broadcast_to(grid_size, games))
+    skill = rng.beta(5, 2, games) if skill is None else np.asarray(skill)
+
+    # All boards live in one cell space: board b's cells start at offsets[b]
+    # in the shared neighbour table, but each game stores its own local ids
+    boards, board_of = np.unique(canvas_size // grid_size, return_inverse=True)
+    tables = [neighbour_table(tiles) for tiles in boards]
+    offsets = np.concatenate([[0], np.cumsum([len(table) for table in tables])[:-1]])
+    neighbours = np.concatenate(tables)
+    tiles = boards[board_of]
+    cells = tiles * tiles
+    max_cells = int(cells.max())
+
+    # Cells past the end of a smaller board are marked occupied so food never lands there
+    occupied = np.arange(max_cells) >= cells[:, None]
+    # Ring buffer of cell ids per game, head at head_slot
+    body = np.zeros((games, max_cells), dtype=np.int16 if max_cells < 2 ** 15 else np.int32)
+    results = {name: np.zeros(games, dtype=np.int64)
+               for name in ('score', 'snake_length', 'game_speed', 'ticks', 'duration_ms')}
+
+    # Per-game state of the games still running; `g` maps each entry to its game id
+    g = np.arange(games)
+    offset = offsets[board_of]
+    head = (tiles // 2) * tiles + tiles // 2
+    body[:, 0] = head
+    occupied[g, head] = True
+    head_slot = np.zeros(games, dtype=np.int64)
+    length = np.ones(games, dtype=np.int64)
+    heading = rng.integers(0, 4, games)
+    food = spawn_food(occupied, g, cells, rng)
+    foods = np.zeros(games, dtype=np.int64)
+    speed = np.array(np.broadcast_to(base_speed, games))
+    auto_speed = np.array(np.broadcast_to(auto_speed, games))
+    duration = np.zeros(games, dtype=np.int64)
+
+    def careless_rate(skill, speed):
+        # Weak players and high speeds make more random moves
+        return MISTAKE_RATE * (1 - skill) * (game_speed(DEFAULT_BASE_SPEED) / game_speed(speed))
+
+    mistakes = careless_rate(skill, speed)
+
+    def finish(done, tick):
+        for name, values in (('score', foods), ('snake_length', length), ('game_speed', game_speed(speed)),
+                             ('ticks', tick), ('duration_ms', duration)):
+            results[name][g[done]] = values[done] if np.ndim(values) else values
+
+    for tick in range(1, MAX_TICKS + 1):
+        if not len(g):
+            break
+        rows = np.arange(len(g))
+        target = neighbours[offset + head]
+        tail = body[g, (head_slot + length - 1) % max_cells]
+        # The tail vacates its cell on the same tick, so following it is safe
+        flat = (g * max_cells)[:, None] + target
+        safe = (target >= 0) & (~occupied.ravel()[flat] | (target == tail[:, None]))
+        # Prefer safe moves towards the food; a coin flip per game breaks
+        # ties between closing the gap along x or along y
+        toward = (DIRECTIONS[:, 0] * np.sign(food % tiles - head % tiles)[:, None] +
+                  DIRECTIONS[:, 1] * np.sign(food // tiles - head // tiles)[:, None])
+        cost = np.where(safe, 4 - 2 * toward - (HORIZONTAL ^ (rng.random(len(g)) < 0.5)[:, None]), 16)
+        cost[rows, REVERSE[heading]] = 32
+        choice = np.argmin(cost, axis=1)
+
+        careless = rng.random(len(g)) < mistakes
+        if careless.any():
+            # Any turn but a reversal, which the game ignores
+            turn = (heading[careless] + rng.integers(1, 4, careless.sum())) % 4
+            choice[careless] = np.where(turn == REVERSE[heading[careless]], heading[careless], turn)
+
+        duration += game_speed(speed)
+        crashed = ~safe[rows, choice]
+        if crashed.any():
+            finish(crashed, tick)
+            moving = ~crashed
+            g, rows, choice, tail, target = g[moving], rows[:moving.sum()], choice[moving], tail[moving], target[moving]
+            head, head_slot, length, heading, food = head[moving], head_slot[moving], length[moving], heading[moving], food[moving]
+            foods, speed, auto_speed, duration = foods[moving], speed[moving], auto_speed[moving], duration[moving]
+            skill, mistakes, tiles, cells, offset = skill[moving], mistakes[moving], tiles[moving], cells[moving], offset[moving]
+        head = target[rows, choice]
+        heading = choice
+
+        eating = head == food
+        shrinking = ~eating
+        occupied[g[shrinking], tail[shrinking]] = False
+        length -= shrinking
+        head_slot = (head_slot - 1) % max_cells
+        body[g, head_slot] = head
+        occupied[g, head] = True
+        length += 1
+
+        if eating.any():
+            foods += eating
+            speed_up = eating & auto_speed & (foods % 3 == 0)
+            if speed_up.any():
+                speed[speed_up] = np.minimum(10, speed[speed_up] + 1)
+                mistakes[speed_up] = careless_rate(skill[speed_up], speed[speed_up])
+            food[eating] = spawn_food(occupied, g[eating], cells[eating], rng)
+    finish(np.ones(len(g), dtype=bool), MAX_TICKS)
+    results.update(foods_eaten=results['score'].copy(), canvas_size=canvas_size, grid_size=grid_size)
+    return results
+
+
+def simulate_batch(games, seed=None):
+    """Simulate ``games`` games with settings drawn the way players pick them.
+
+    Games are split into small and large boards (so padding stays modest)
+    and each part is simulated in chunks of at most SIMULATION_CHUNK games.
+    Returns a dict of Score columns as arrays.
+    """
+    rng = np.random.default_rng(seed)
+    canvas = rng.choice(CANVAS_SIZES, games, p=CANVAS_WEIGHTS)
+    grid = rng.choice(GRID_SIZES, games, p=GRID_WEIGHTS)
+    base = rng.choice(BASE_SPEEDS, games, p=BASE_SPEED_WEIGHTS)
+    auto = rng.random(games) < AUTO_SPEED_SHARE
+    columns = {name: np.zeros(games, dtype=np.int64) for name in SCORE_COLUMNS}
+    large = (canvas // grid) > LARGE_BOARD_TILES
+    for members in (np.flatnonzero(~large), np.flatnonzero(large)):
+        for chunk in np.array_split(members, -(-len(members) // SIMULATION_CHUNK)):
+            result = simulate(len(chunk), canvas[chunk], grid[chunk], base[chunk], auto[chunk],
+                              seed=rng.integers(2 ** 63))
+            for name in SCORE_COLUMNS:
+                columns[name][chunk] = result[name]
+    return columns
+
+
+def generate_scores(count, user_ids, start=None, end=None, seed=None, batch_size=20000, workers=1):
+    """Yield lists of synthetic Score rows (dicts) totalling ``count`` games.
+
+    Each row gets a random user from ``user_ids`` and a played_at between
+    ``start`` and ``end`` (the last 30 days by default); batches come out in
+    played_at order. With ``workers`` > 1 batches are simulated in that many
+    processes.
+    """
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=30)
+    span = (end - start).total_seconds()
+    user_ids = np.asarray(user_ids)
+    sizes = [min(batch_size, count - offset) for offset in range(0, count, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes) + 1)
+    rng = np.random.default_rng(seeds.pop())
+
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        batches = (executor.map if executor else map)(simulate_batch, sizes, seeds)
+        done = 0
+        for games, columns in zip(sizes, batches):
+            users = rng.choice(user_ids, games)
+            seconds = (done + np.sort(rng.random(games)) * games) / count * span
+            done += games
+            yield [
+                {'user_id': int(users[i]), **{name: int(columns[name][i]) for name in SCORE_COLUMNS},
+                 'played_at': start + timedelta(seconds=float(seconds[i]))}
+                for i in range(games)
+            ]
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+
+# Replays
+# A replay is a 6-byte header (format version, flags with bit 0 = auto speed
+# on at the start, little-endian uint32 seed for the food generator) followed
+# by one unsigned LEB128 varint per event: (ticks since the previous event << 3)
+# | kind. Ticks count completed game ticks. Kinds 0-3 turn the snake (same
+# order as DIRECTIONS), 4 and 5 are the speed buttons, 6 toggles auto speed
+# and 7 marks the end: the tick after it must crash. replay_game() re-runs the
+# exact logic of static/src/game.js, including its free-cell list and its
+# mulberry32 food generator, so a replay reproduces the game bit for bit.
+REPLAY_VERSION = 1
+REPLAY_HEADER = 6
+REPLAY_SPEED_UP, REPLAY_SPEED_DOWN, REPLAY_AUTO_TOGGLE, REPLAY_END = 4, 5, 6, 7
+REPLAY_MAX_TICKS = 200000
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def mulberry32(seed):
+    """The game's food generator: floats in [0, 1) from a 32-bit seed."""
+    state = seed & 0xFFFFFFFF
+
+    def imul(a, b):
+        return (a * b) & 0xFFFFFFFF
+
+    def random():
+        nonlocal state
+        state = (state + 0x6D2B79F5) & 0xFFFFFFFF
+        t = imul(state ^ (state >> 15), 1 | state)
+        t = ((t + imul(t ^ (t >> 7), 61 | t)) & 0xFFFFFFFF) ^ t
+        return (t ^ (t >> 14)) / 4294967296
+
+    return random
+
+
+def decode_replay(data):
+    """Return (seed, auto_speed, [(tick, kind), ...]) with absolute ticks."""
+    if len(data) < REPLAY_HEADER or data[0] != REPLAY_VERSION:
+        raise ReplayError('unsupported replay format')
+    seed = int.from_bytes(data[2:6], 'little')
+    events, tick, value, shift = [], 0, 0, 0
+    for byte in data[REPLAY_HEADER:]:
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte & 0x80:
+            if shift > 35:
+                raise ReplayError('varint too long')
+            continue
+        tick += value >> 3
+        events.append((tick, value & 7))
+        value, shift = 0, 0
+    if shift or not events or events[-1][1] != REPLAY_END or any(kind == REPLAY_END for _, kind in events[:-1]):
+        raise ReplayError('replay does not end with a single end marker')
+    if tick > REPLAY_MAX_TICKS:
+        raise ReplayError('replay too long')
+    return seed, bool(data[1] & 1), events
+
+
+def replay_game(data, canvas_size, grid_size):
+    """Re-simulate a replay; returns the columns save_score records or raises ReplayError."""
+    seed, auto_speed, events = decode_replay(data)
+    tiles = canvas_size // grid_size
+    if not 2 <= tiles <= 200:
+        raise ReplayError('unsupported board size')
+    cells = tiles * tiles
+    random = mulberry32(seed)
+    occupied = bytearray(cells)
+    free_cells = list(range(cells))
+    free_index = list(range(cells))
+    body = [0] * cells
+    # Mutable game state, mirroring the variables in game.js
+    state = {'free': cells, 'head_slot': 0, 'length': 0, 'food': None, 'foods': 0,
+             'dx': 0, 'dy': 0, 'base': 5, 'auto': auto_speed}
+
+    def claim(cell):
+        slot = free_index[cell]
+        state['free'] -= 1
+        last = free_cells[state['free']]
+        free_cells[slot] = last
+        free_index[last] = slot
+        occupied[cell] = 1
+
+    def release(cell):
+        free_cells[state['free']] = cell
+        free_index[cell] = state['free']
+        state['free'] += 1
+        occupied[cell] = 0
+
+    def push_head(cell):
+        state['head_slot'] = (state['head_slot'] - 1) % cells
+        body[state['head_slot']] = cell
+        state['length'] += 1
+        claim(cell)
+
+    def spawn_food():
+        state['food'] = free_cells[int(random() * state['free'])] if state['free'] else None
+
+    def step():
+        # One call of moveSnake(); False when the move crashes
+        dx, dy = state['dx'], state['dy']
+        if dx == 0 and dy == 0:
+            return True
+        head = body[state['head_slot']]
+        x, y = head % tiles + dx, head // tiles + dy
+        if not (0 <= x < tiles and 0 <= y < tiles):
+            return False
+        cell = y * tiles + x
+        tail = body[(state['head_slot'] + state['length'] - 1) % cells]
+        if occupied[cell] and cell != tail:
+            return False
+        eating = cell == state['food']
+        if not eating:
+            state['length'] -= 1
+            release(tail)
+        push_head(cell)
+        if eating:
+            state['foods'] += 1
+            if state['auto'] and state['foods'] % 3 == 0:
+                state['base'] = min(10, state['base'] + 1)
+            spawn_food()
+        return True
+
+    push_head((tiles // 2) * tiles + tiles // 2)
+    spawn_food()
+    tick = 0
+    for at, kind in events:
+        while tick < at:
+            if not step():
+                raise ReplayError(f'snake crashed early, at tick {tick + 1}')
+            tick += 1
+        if kind < 4:
+            dx, dy = (int(v) for v in DIRECTIONS[kind])
+            if (dx, dy) in ((state['dx'], state['dy']), (-state['dx'], -state['dy'])):
+                raise ReplayError(f'invalid turn at tick {tick}')
+            state['dx'], state['dy'] = dx, dy
+        elif kind == REPLAY_SPEED_UP:
+            state['base'] = min(10, state['base'] + 1)
+        elif kind == REPLAY_SPEED_DOWN:
+            state['base'] = max(1, state['base'] - 1)
+        elif kind == REPLAY_AUTO_TOGGLE:
+            state['auto'] = not state['auto']
+        elif step():
+            raise ReplayError('game did not end where the replay does')
+    return {'score': state['foods'], 'snake_length': state['length'], 'foods_eaten': state['foods'],
+            'game_speed': int(game_speed(state['base']))}
+
+
+def verify_replays(jobs):
+    """Check [(score_id, replay, claims)] -> [(score_id, verified)].
+
+    Runs in the app's verification pool, whose processes import this module
+    rather than the app, so it must stay free of app state.
+    """
+    results = []
+    for score_id, replay, claims in jobs:
+        try:
+            replayed = replay_game(replay, claims['canvas_size'], claims['grid_size'])
+        except ReplayError:
+            results.append((score_id, False))
+            continue
+        results.append((score_id, all(claims[name] == value for name, value in replayed.items())))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--games', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    scores = np.concatenate([[row['score'] for row in rows] for rows in
+                             generate_scores(args.games, range(1, 1001), seed=args.seed, workers=args.workers)])
+    elapsed = time.perf_counter() - started
+    print(f'{args.games} games in {elapsed:.1f}s ({args.games / elapsed * 60:,.0f} rows/minute)')
+    print('score percentiles p10/p50/p90/p99:', *np.percentile(scores, [10, 50, 90, 99]).astype(int))
+    print(f'mean score {scores.mean():.1f}, max {scores.max()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+// Older history is fetched page by page from /api/scores instead of being rendered up front
+async function loadOlderScores() {
+    const button = document.getElementById('loadOlder');
+    button.disabled = true;
+    try {
+        const response = await fetch('/api/scores?before=' + encodeURIComponent(button.dataset.cursor));
+        const data = await response.json();
+        const cards = document.getElementById('historyCards');
+        const rows = document.getElementById('historyRows');
+        data.scores.forEach((s) => {
+            const day = s.played_at.slice(0, 10);
+            const time = s.played_at.slice(11, 19);
+            cards.insertAdjacentHTML('beforeend', `
+                <div class="bg-white/10 rounded-lg p-4 border border-white/20">
+                    <div class="flex justify-between items-center mb-2">
+                        <span class="text-yellow-300 font-bold text-lg">${s.score}</span>
+                        <span class="text-white/70 text-xs">${day.slice(5, 7)}/${day.slice(8, 10)} ${time.slice(0, 5)}</span>
+                    </div>
+                    <div class="grid grid-cols-2 gap-2 text-sm text-white/80">
+                        <div>Length: <span class="text-white font-semibold">${s.snake_length}</span></div>
+                        <div>Foods: <span class="text-white font-semibold">${s.foods_eaten}</span></div>
+                        <div>Speed: <span class="text-white font-semibold">${s.game_speed}ms</span></div>
+                        <div>Size: <span class="text-white font-semibold">${s.canvas_size}x${s.canvas_size}</span></div>
+                    </div>
+                </div>`);
+            rows.insertAdjacentHTML('beforeend', `
+                <tr class="border-b border-white/20 hover:bg-white/10 transition-colors">
+                    <td class="py-3 px-4 text-sm">${day} ${time}</td>
+                    <td class="py-3 px-4 font-bold text-yellow-300">${s.score}</td>
+                    <td class="py-3 px-4 text-sm">${s.snake_length}</td>
+                    <td class="py-3 px-4 text-sm">${s.foods_eaten}</td>
+                    <td class="py-3 px-4 text-sm">${s.game_speed}ms</td>
+                    <td class="py-3 px-4 text-sm">${s.canvas_size}x${s.canvas_size}</td>
+                </tr>`);
+        });
+        if (data.next) {
+            button.dataset.cursor = data.next;
+        } else {
+            button.remove();
+        }
+    } catch (error) {
+        console.error('Error loading scores:', error);
+    } finally {
+        button.disabled = false;
+    }
+}
+
+// Charts are drawn straight onto canvases sized to their CSS box
+function prepareCanvas(canvas) {
+    const ratio = window.devicePixelRatio || 1;
+    canvas.width = canvas.clientWidth * ratio;
+    canvas.height = canvas.clientHeight * ratio;
+    const ctx = canvas.getContext('2d');
+    ctx.scale(ratio, ratio);
+    return { ctx, width: canvas.clientWidth, height: canvas.clientHeight };
+}
+
+function drawHistogram(canvas, histogram) {
+    const { ctx, width, height } = prepareCanvas(canvas);
+    const peak = Math.max(1, ...histogram.counts);
+    const barWidth = width / Math.max(1, histogram.counts.length);
+    ctx.fillStyle = 'rgba(253, 224, 71, 0.85)';
+    histogram.counts.forEach((count, i) => {
+        const barHeight = (count / peak) * (height - 16);
+        ctx.fillRect(i * barWidth + 1, height - barHeight, barWidth - 2, barHeight);
+    });
+    ctx.fillStyle = 'rgba(255, 255, 255, 0.8)';
+    ctx.font = '11px sans-serif';
+    ctx.fillText(`from ${histogram.start}, ${histogram.bin_width} points per bar`, 6, 12);
+}
+
+function drawLine(canvas, values) {
+    const { ctx, width, height } = prepareCanvas(canvas);
+    if (values.length < 2) {
+        return;
+    }
+    const low = Math.min(...values);
+    const high = Math.max(...values);
+    const span = Math.max(1, high - low);
+    ctx.strokeStyle = 'rgba(134, 239, 172, 0.95)';
+    ctx.lineWidth = 2;
+    ctx.beginPath();
+    values.forEach((value, i) => {
+        const x = (i / (values.length - 1)) * width;
+        const y = height - 8 - ((value - low) / span) * (height - 24);
+        if (i === 0) {
+            ctx.moveTo(x, y);
+        } else {
+            ctx.lineTo(x, y);
+        }
+    });
+    ctx.stroke();
+    ctx.fillStyle = 'rgba(255, 255, 255, 0.8)';
+    ctx.font = '11px sans-serif';
+    ctx.fillText(`${low.toFixed(1)} – ${high.toFixed(1)}`, 6, 12);
+}
+
+async function loadAnalytics() {
+    const panel = document.getElementById('analytics');
+    if (!panel) {
+        return;
+    }
+    try {
+        const response = await fetch('/api/analytics');
+        const data = await response.json();
+        drawHistogram(document.getElementById('histogramChart'), data.histogram);
+        drawLine(document.getElementById('movingAverageChart'), data.moving_average.points.map((p) => p[1]));
+        document.getElementById('movingAverageLabel').textContent =
+            `Average of the last ${data.moving_average.window} games`;
+        if (data.trend.direction) {
+            const arrow = { improving: '↑', declining: '↓', steady: '→' }[data.trend.direction];
+            document.getElementById('analyticsTrend').textContent =
+                `${arrow} ${data.trend.direction} over ${data.trend.days} days played (${data.trend.slope_per_day} per day)`;
+        }
+        const rows = document.getElementById('settingsRows');
+        data.best_by_settings.slice(0, 10).forEach((s) => {
+            rows.insertAdjacentHTML('beforeend', `
+                <tr class="border-b border-white/20">
+                    <td class="py-2 px-4 text-sm">${s.game_speed}ms</td>
+                    <td class="py-2 px-4 text-sm">${s.grid_size}</td>
+                    <td class="py-2 px-4 text-sm">${s.canvas_size}x${s.canvas_size}</td>
+                    <td class="py-2 px-4 text-sm">${s.games}</td>
+                    <td class="py-2 px-4 font-bold text-yellow-300">${s.best}</td>
+                    <td class="py-2 px-4 text-sm">${s.average}</td>
+                </tr>`);
+        });
+    } catch (error) {
+        console.error('Error loading analytics:', error);
+    }
+}
+
+loadAnalytics();
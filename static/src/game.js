@@ -0,0 +1,617 @@
+const canvas = document.getElementById('gameCanvas');
+const ctx = canvas.getContext('2d');
+const scoreEl = document.getElementById('score');
+const highScoreEl = document.getElementById('highScore');
+const gameOverEl = document.getElementById('gameOver');
+const finalScoreEl = document.getElementById('finalScore');
+const finalLengthEl = document.getElementById('finalLength');
+const speedDisplayEl = document.getElementById('speedDisplay');
+const currentSpeedEl = document.getElementById('currentSpeed');
+const snakeLengthEl = document.getElementById('snakeLength');
+const foodsEatenEl = document.getElementById('foodsEaten');
+const canvasSizeEl = document.getElementById('canvasSize');
+const gridInfoEl = document.getElementById('gridInfo');
+const autoSpeedCheckbox = document.getElementById('autoSpeed');
+const fpsOverlayEl = document.getElementById('fpsOverlay');
+
+let canvasSize = 400;
+let gridSize = 20;
+let tileCount = canvasSize / gridSize;
+
+let dx = 0;
+let dy = 0;
+let food = null;
+let score = 0;
+let foodsEaten = 0;
+let highScore = localStorage.getItem('snakeHighScore') || 0;
+let gameRunning = true;
+let gamePaused = false;
+let baseSpeed = 5;
+let gameSpeed = 100;
+let animationFrame = null;
+
+// Fixed timestep
+// Ticks are driven by an accumulator of elapsed frame time rather than by
+// comparing frame timestamps, so the snake moves exactly once per
+// `gameSpeed` ms on average however irregularly frames arrive. After a
+// stall (busy main thread, background tab) at most MAX_CATCH_UP_TICKS are
+// replayed in one frame and the rest of the backlog is dropped. Turns are
+// queued and consumed one per tick, and the head is drawn interpolated
+// between its last two cells.
+const MAX_CATCH_UP_TICKS = 5;
+const MAX_QUEUED_TURNS = 3;
+let accumulator = 0;
+let lastFrameTime = null;
+let inputQueue = [];
+let lastMove = null;
+
+// Rendering
+// The background grid is drawn once per size change onto an offscreen layer,
+// and the head, body and food sprites are pre-rendered for the current cell
+// size. After a full paint, each tick only repaints the cells that changed:
+// the old head, the vacated tail cell, the new head and a respawned food.
+const dpr = window.devicePixelRatio || 1;
+let gridLayer = null;
+let sprites = {};
+let dirtyCells = [];
+let needsFullRedraw = true;
+
+// Board state
+// Cells are numbered y * tileCount + x. `occupied` holds one byte per cell,
+// `freeCells` is a dense list of empty cells with `freeIndex` giving each
+// cell's slot in it, and the snake body is a ring buffer of cell ids with
+// the head at `bodyHead`. Claiming, releasing, spawning food and collision
+// checks are all constant time regardless of snake length.
+let occupied = null;
+let freeCells = null;
+let freeIndex = null;
+let freeCount = 0;
+let body = null;
+let bodyHead = 0;
+let snakeLength = 0;
+
+// Replay
+// Every game is recorded as the food generator's seed plus a list of events
+// (turns, speed changes, end) tagged with the tick they happened after, and
+// sent along with the score so the server can re-simulate and verify it.
+// encodeReplay() documents the byte format; simulator.py decodes it.
+const REPLAY_VERSION = 1;
+const REPLAY_SPEED_UP = 4;
+const REPLAY_SPEED_DOWN = 5;
+const REPLAY_AUTO_TOGGLE = 6;
+const REPLAY_END = 7;
+let random = Math.random;
+let replaySeed = 0;
+let replayAutoSpeed = true;
+let replayEvents = [];
+let replayTick = 0;
+let lastEventTick = 0;
+
+highScoreEl.textContent = highScore;
+updateSpeedDisplay();
+gridInfoEl.textContent = tileCount + 'x' + tileCount;
+setupCanvas();
+
+function drawGame(timestamp) {
+    if (!gameRunning) return;
+    animationFrame = requestAnimationFrame(drawGame);
+    countFrame(timestamp);
+
+    const elapsed = lastFrameTime === null ? 0 : timestamp - lastFrameTime;
+    lastFrameTime = timestamp;
+    if (gamePaused) return;
+
+    accumulator += elapsed;
+    let ticks = 0;
+    let crashed = false;
+    while (accumulator >= gameSpeed) {
+        if (ticks === MAX_CATCH_UP_TICKS) {
+            accumulator = 0;
+            break;
+        }
+        accumulator -= gameSpeed;
+        ticks++;
+        if (!moveSnake()) {
+            crashed = true;
+            break;
+        }
+        replayTick++;
+    }
+
+    const renderStart = performance.now();
+    renderFrame(crashed ? 1 : accumulator / gameSpeed);
+    countRender(performance.now() - renderStart);
+
+    if (crashed) gameOver();
+}
+
+function createLayer(width, height) {
+    const layer = typeof OffscreenCanvas !== 'undefined'
+        ? new OffscreenCanvas(Math.round(width * dpr), Math.round(height * dpr))
+        : Object.assign(document.createElement('canvas'), {width: Math.round(width * dpr), height: Math.round(height * dpr)});
+    const layerCtx = layer.getContext('2d');
+    layerCtx.scale(dpr, dpr);
+    return [layer, layerCtx];
+}
+
+function setupCanvas() {
+    // Back the canvas with device pixels so sprites stay sharp on HiDPI screens
+    canvas.width = Math.round(canvasSize * dpr);
+    canvas.height = Math.round(canvasSize * dpr);
+    canvas.style.width = canvasSize + 'px';
+    ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+    buildGridLayer();
+    buildSprites();
+    needsFullRedraw = true;
+}
+
+function buildGridLayer() {
+    const [layer, layerCtx] = createLayer(canvasSize, canvasSize);
+    layerCtx.fillStyle = '#111827';
+    layerCtx.fillRect(0, 0, canvasSize, canvasSize);
+
+    layerCtx.strokeStyle = '#1f2937';
+    layerCtx.lineWidth = 0.5;
+    layerCtx.beginPath();
+    for (let i = 0; i < tileCount; i++) {
+        layerCtx.moveTo(i * gridSize, 0);
+        layerCtx.lineTo(i * gridSize, canvasSize);
+        layerCtx.moveTo(0, i * gridSize);
+        layerCtx.lineTo(canvasSize, i * gridSize);
+    }
+    layerCtx.stroke();
+    gridLayer = layer;
+}
+
+function buildSegmentSprite(fromColor, toColor, withEyes) {
+    const [sprite, spriteCtx] = createLayer(gridSize, gridSize);
+    const gradient = spriteCtx.createLinearGradient(0, 0, gridSize, gridSize);
+    gradient.addColorStop(0, fromColor);
+    gradient.addColorStop(1, toColor);
+    spriteCtx.fillStyle = gradient;
+    spriteCtx.fillRect(1, 1, gridSize - 2, gridSize - 2);
+
+    if (withEyes) {
+        spriteCtx.fillStyle = 'white';
+        const eyeSize = Math.max(2, gridSize / 8);
+        const eyeOffset = gridSize / 4;
+        spriteCtx.fillRect(eyeOffset, eyeOffset, eyeSize, eyeSize);
+        spriteCtx.fillRect(gridSize - eyeOffset - eyeSize, eyeOffset, eyeSize, eyeSize);
+    }
+    return sprite;
+}
+
+function buildSprites() {
+    const [food, foodCtx] = createLayer(gridSize, gridSize);
+    const gradient = foodCtx.createRadialGradient(gridSize / 2, gridSize / 2, 0, gridSize / 2, gridSize / 2, gridSize / 2);
+    gradient.addColorStop(0, '#ef4444');
+    gradient.addColorStop(1, '#dc2626');
+    foodCtx.fillStyle = gradient;
+    foodCtx.beginPath();
+    foodCtx.arc(gridSize / 2, gridSize / 2, gridSize / 2 - 2, 0, Math.PI * 2);
+    foodCtx.fill();
+
+    sprites = {
+        head: buildSegmentSprite('#10b981', '#059669', true),
+        body: buildSegmentSprite('#34d399', '#10b981', false),
+        food: food
+    };
+}
+
+function paintCell(x, y, sprite) {
+    // Restore the cell's background from the grid layer, then stamp the sprite
+    const px = x * gridSize;
+    const py = y * gridSize;
+    ctx.drawImage(gridLayer, px * dpr, py * dpr, gridSize * dpr, gridSize * dpr, px, py, gridSize, gridSize);
+    if (sprite) {
+        ctx.drawImage(sprite, px, py, gridSize, gridSize);
+    }
+}
+
+function renderFrame(alpha) {
+    if (needsFullRedraw) {
+        ctx.drawImage(gridLayer, 0, 0, canvasSize, canvasSize);
+        if (food) paintCell(food.x, food.y, sprites.food);
+        for (let i = 0; i < snakeLength; i++) {
+            const cell = segmentAt(i);
+            paintCell(cell % tileCount, Math.floor(cell / tileCount), i === 0 ? sprites.head : sprites.body);
+        }
+        needsFullRedraw = false;
+    } else {
+        dirtyCells.forEach(([x, y, sprite]) => paintCell(x, y, sprite));
+    }
+    dirtyCells = [];
+
+    if (lastMove) {
+        // Repaint the two cells the head spans, then glide it between them
+        const [fromX, fromY, toX, toY] = lastMove;
+        paintCell(fromX, fromY, snakeLength > 1 ? sprites.body : null);
+        paintCell(toX, toY, null);
+        ctx.drawImage(sprites.head, (fromX + (toX - fromX) * alpha) * gridSize,
+            (fromY + (toY - fromY) * alpha) * gridSize, gridSize, gridSize);
+    }
+    snakeLengthEl.textContent = snakeLength;
+}
+
+// Frame stats overlay (press F): frames per second and time spent rendering
+let statsWindowStart = 0;
+let statsFrames = 0;
+let statsRenders = 0;
+let statsRenderTime = 0;
+
+function countFrame(timestamp) {
+    statsFrames++;
+    if (timestamp - statsWindowStart < 500) return;
+    if (!fpsOverlayEl.classList.contains('hidden')) {
+        const fps = Math.round(statsFrames * 1000 / (timestamp - statsWindowStart));
+        const renderMs = statsRenders ? (statsRenderTime / statsRenders).toFixed(2) : '0.00';
+        fpsOverlayEl.textContent = fps + ' fps | ' + renderMs + ' ms/render';
+    }
+    statsWindowStart = timestamp;
+    statsFrames = 0;
+    statsRenders = 0;
+    statsRenderTime = 0;
+}
+
+function countRender(elapsed) {
+    statsRenders++;
+    statsRenderTime += elapsed;
+}
+
+function toggleFrameStats() {
+    fpsOverlayEl.classList.toggle('hidden');
+}
+
+function resetBoard(startX, startY) {
+    const cellCount = tileCount * tileCount;
+    if (!occupied || occupied.length !== cellCount) {
+        occupied = new Uint8Array(cellCount);
+        freeCells = new Int32Array(cellCount);
+        freeIndex = new Int32Array(cellCount);
+        body = new Int32Array(cellCount);
+    } else {
+        occupied.fill(0);
+    }
+    for (let cell = 0; cell < cellCount; cell++) {
+        freeCells[cell] = cell;
+        freeIndex[cell] = cell;
+    }
+    freeCount = cellCount;
+    bodyHead = 0;
+    snakeLength = 0;
+    pushHead(startY * tileCount + startX);
+}
+
+function claimCell(cell) {
+    // Swap the last free cell into this one's slot
+    const slot = freeIndex[cell];
+    const last = freeCells[--freeCount];
+    freeCells[slot] = last;
+    freeIndex[last] = slot;
+    occupied[cell] = 1;
+}
+
+function releaseCell(cell) {
+    freeCells[freeCount] = cell;
+    freeIndex[cell] = freeCount++;
+    occupied[cell] = 0;
+}
+
+function segmentAt(index) {
+    return body[(bodyHead + index) % body.length];
+}
+
+function pushHead(cell) {
+    bodyHead = (bodyHead - 1 + body.length) % body.length;
+    body[bodyHead] = cell;
+    snakeLength++;
+    claimCell(cell);
+}
+
+function popTail() {
+    const cell = segmentAt(snakeLength - 1);
+    snakeLength--;
+    releaseCell(cell);
+    return cell;
+}
+
+function queueTurn(x, y) {
+    // Validate against the last queued heading so two quick turns can't reverse the snake
+    const [lastX, lastY] = inputQueue.length ? inputQueue[inputQueue.length - 1] : [dx, dy];
+    if (inputQueue.length >= MAX_QUEUED_TURNS || (x === lastX && y === lastY) || (x === -lastX && y === -lastY)) return;
+    inputQueue.push([x, y]);
+}
+
+function moveSnake() {
+    // Returns false when the move ends the game; the board is left untouched then
+    if (inputQueue.length) {
+        [dx, dy] = inputQueue.shift();
+        recordEvent(dx === 1 ? 0 : dx === -1 ? 1 : dy === 1 ? 2 : 3);
+    }
+    if (dx === 0 && dy === 0) return true;
+
+    const previousHead = segmentAt(0);
+    const previousX = previousHead % tileCount;
+    const previousY = Math.floor(previousHead / tileCount);
+    const head = {x: previousX + dx, y: previousY + dy};
+    if (checkCollision(head.x, head.y)) return false;
+
+    const eating = food && head.x === food.x && head.y === food.y;
+    if (lastMove) {
+        // Clean up the part of the interpolated head drawn over the previous cell
+        const [fromX, fromY] = lastMove;
+        dirtyCells.push([fromX, fromY, occupied[fromY * tileCount + fromX] ? sprites.body : null]);
+    }
+    // Paint order matters: with a one-segment snake the old head is also the vacated tail
+    dirtyCells.push([previousX, previousY, sprites.body]);
+    if (!eating) {
+        const tail = popTail();
+        dirtyCells.push([tail % tileCount, Math.floor(tail / tileCount), null]);
+    }
+    pushHead(head.y * tileCount + head.x);
+    dirtyCells.push([head.x, head.y, sprites.head]);
+    lastMove = [previousX, previousY, head.x, head.y];
+
+    if (eating) {
+        score++;
+        foodsEaten++;
+        scoreEl.textContent = score;
+        foodsEatenEl.textContent = foodsEaten;
+
+        if (score > highScore) {
+            highScore = score;
+            highScoreEl.textContent = highScore;
+            localStorage.setItem('snakeHighScore', highScore);
+        }
+
+        if (autoSpeedCheckbox.checked && foodsEaten % 3 === 0) {
+            baseSpeed = Math.min(10, baseSpeed + 1);
+            updateSpeedDisplay();
+            calculateGameSpeed();
+        }
+
+        generateFood();
+        if (food) dirtyCells.push([food.x, food.y, sprites.food]);
+    }
+    return true;
+}
+
+function generateFood() {
+    // Pick uniformly among empty cells; a full board has nowhere left to spawn
+    if (freeCount === 0) {
+        food = null;
+        return;
+    }
+    const cell = freeCells[Math.floor(random() * freeCount)];
+    food = {x: cell % tileCount, y: Math.floor(cell / tileCount)};
+}
+
+function checkCollision(x, y) {
+    if (x < 0 || x >= tileCount || y < 0 || y >= tileCount) {
+        return true;
+    }
+
+    // The tail moves out of its cell on this same tick, so following it is allowed
+    const cell = y * tileCount + x;
+    return occupied[cell] === 1 && cell !== segmentAt(snakeLength - 1);
+}
+
+function mulberry32(seed) {
+    // Small seeded generator for food placement, so replays are reproducible
+    return function() {
+        seed = (seed + 0x6D2B79F5) | 0;
+        let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+        t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}
+
+function startReplay() {
+    replaySeed = crypto.getRandomValues(new Uint32Array(1))[0];
+    random = mulberry32(replaySeed);
+    replayAutoSpeed = autoSpeedCheckbox.checked;
+    replayEvents = [];
+    replayTick = 0;
+    lastEventTick = 0;
+}
+
+function recordEvent(kind) {
+    replayEvents.push([replayTick - lastEventTick, kind]);
+    lastEventTick = replayTick;
+}
+
+function encodeReplay() {
+    // Header: version, flags (bit 0: auto speed), seed as little-endian uint32.
+    // Then one LEB128 varint per event: (ticks since previous event << 3) | kind
+    const bytes = [REPLAY_VERSION, replayAutoSpeed ? 1 : 0,
+        replaySeed & 255, (replaySeed >>> 8) & 255, (replaySeed >>> 16) & 255, replaySeed >>> 24];
+    for (const [delta, kind] of replayEvents) {
+        let value = delta * 8 + kind;
+        while (value >= 128) {
+            bytes.push((value % 128) | 128);
+            value = Math.floor(value / 128);
+        }
+        bytes.push(value);
+    }
+    let binary = '';
+    for (const byte of bytes) binary += String.fromCharCode(byte);
+    return btoa(binary);
+}
+
+async function gameOver() {
+    gameRunning = false;
+    cancelAnimationFrame(animationFrame);
+    recordEvent(REPLAY_END);
+    finalScoreEl.textContent = score;
+    finalLengthEl.textContent = snakeLength;
+    gameOverEl.classList.remove('hidden');
+
+    // Save score to database if user is logged in
+    if (document.body.dataset.authenticated !== 'true') return;
+    try {
+        const response = await fetch('/api/save_score', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                score: score,
+                snake_length: snakeLength,
+                foods_eaten: foodsEaten,
+                game_speed: gameSpeed,
+                canvas_size: canvasSize,
+                grid_size: gridSize,
+                replay: encodeReplay()
+            })
+        });
+        const data = await response.json();
+        if (data.success) {
+            console.log('Score saved successfully!');
+        }
+    } catch (error) {
+        console.error('Error saving score:', error);
+    }
+}
+
+function restartGame() {
+    resetBoard(Math.floor(tileCount / 2), Math.floor(tileCount / 2));
+    dx = 0;
+    dy = 0;
+    score = 0;
+    foodsEaten = 0;
+    baseSpeed = 5;
+    scoreEl.textContent = score;
+    foodsEatenEl.textContent = foodsEaten;
+    gameRunning = true;
+    gamePaused = false;
+    gameOverEl.classList.add('hidden');
+    updateSpeedDisplay();
+    calculateGameSpeed();
+    startReplay();
+    generateFood();
+    dirtyCells = [];
+    needsFullRedraw = true;
+    accumulator = 0;
+    lastFrameTime = null;
+    inputQueue = [];
+    lastMove = null;
+    // Never run two loops at once when restarting mid-game
+    cancelAnimationFrame(animationFrame);
+    animationFrame = requestAnimationFrame(drawGame);
+}
+
+function pauseGame() {
+    gamePaused = !gamePaused;
+    document.getElementById('pauseBtn').textContent = gamePaused ? '▶️ Resume' : '⏸️ Pause';
+}
+
+function increaseSpeed() {
+    recordEvent(REPLAY_SPEED_UP);
+    baseSpeed = Math.min(10, baseSpeed + 1);
+    updateSpeedDisplay();
+    calculateGameSpeed();
+}
+
+function decreaseSpeed() {
+    recordEvent(REPLAY_SPEED_DOWN);
+    baseSpeed = Math.max(1, baseSpeed - 1);
+    updateSpeedDisplay();
+    calculateGameSpeed();
+}
+
+function updateSpeedDisplay() {
+    speedDisplayEl.textContent = baseSpeed;
+}
+
+function calculateGameSpeed() {
+    gameSpeed = Math.max(30, 200 - (baseSpeed * 15));
+    currentSpeedEl.textContent = gameSpeed + 'ms';
+}
+
+function changeGridSize() {
+    const newGridSize = parseInt(document.getElementById('gridSize').value);
+    gridSize = newGridSize;
+    tileCount = Math.floor(canvasSize / gridSize);
+    setupCanvas();
+    canvasSizeEl.textContent = canvasSize + 'x' + canvasSize;
+    gridInfoEl.textContent = tileCount + 'x' + tileCount;
+    restartGame();
+}
+
+function changePlaygroundSize() {
+    canvasSize = parseInt(document.getElementById('playgroundSize').value);
+    tileCount = Math.floor(canvasSize / gridSize);
+    setupCanvas();
+    canvasSizeEl.textContent = canvasSize + 'x' + canvasSize;
+    gridInfoEl.textContent = tileCount + 'x' + tileCount;
+    restartGame();
+}
+
+document.addEventListener('keydown', (e) => {
+    switch(e.key) {
+        case 'ArrowUp':
+        case 'w':
+        case 'W':
+            queueTurn(0, -1);
+            e.preventDefault();
+            break;
+        case 'ArrowDown':
+        case 's':
+        case 'S':
+            queueTurn(0, 1);
+            e.preventDefault();
+            break;
+        case 'ArrowLeft':
+        case 'a':
+        case 'A':
+            queueTurn(-1, 0);
+            e.preventDefault();
+            break;
+        case 'ArrowRight':
+        case 'd':
+        case 'D':
+            queueTurn(1, 0);
+            e.preventDefault();
+            break;
+        case ' ':
+            pauseGame();
+            e.preventDefault();
+            break;
+        case 'f':
+        case 'F':
+            toggleFrameStats();
+            break;
+    }
+});
+
+autoSpeedCheckbox.addEventListener('change', () => recordEvent(REPLAY_AUTO_TOGGLE));
+
+// Live records: new top scores pushed by the server as they happen. The panel
+// stays hidden when the server does not offer the feed (it answers 503 and
+// EventSource gives up without reconnecting).
+const LIVE_FEED_ITEMS = 5;
+const PERIOD_LABELS = { all: 'all time', daily: 'today', weekly: 'this week' };
+
+function describeRecord(record) {
+    const board = record.grid_size === null
+        ? 'overall'
+        : `${record.grid_size}×${record.grid_size}, ${record.canvas_size}px, ${record.game_speed}ms`;
+    return `${record.username} scored ${record.score}: #${record.rank} ${PERIOD_LABELS[record.period]} (${board})`;
+}
+
+function startLiveFeed() {
+    if (!window.EventSource) return;
+    const panel = document.getElementById('liveFeed');
+    const list = document.getElementById('liveFeedList');
+    const source = new EventSource('/api/feed');
+    source.addEventListener('record', (e) => {
+        const item = document.createElement('li');
+        item.textContent = describeRecord(JSON.parse(e.data));
+        list.prepend(item);
+        while (list.children.length > LIVE_FEED_ITEMS) list.lastChild.remove();
+        panel.classList.remove('hidden');
+    });
+}
+
+startLiveFeed();
+restartGame();
@@ -0,0 +1,9 @@
+/** Tailwind build used by build_assets.py: only classes that appear in the
+ * templates in app.py or in the game scripts end up in app.css. */
+module.exports = {
+  content: ['./app.py', './static/src/**/*.js'],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};
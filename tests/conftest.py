@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+from itertools import count
+
+import pytest
+
+# app.py reads its settings and opens the database at import, so point it at a
+# scratch directory before any test imports it
+DATA_DIR = tempfile.mkdtemp(prefix='snake-tests-')
+os.environ['DATABASE_URL'] = f'sqlite:///{DATA_DIR}/snake.db'
+os.environ['HASH_SLOT_DIR'] = DATA_DIR
+# Hashing cost is not under test; keep registrations fast
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['SCORE_WRITE_MODE'] = 'sync'
+os.environ['SCORE_SHARDS'] = '1'
+os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as snake  # noqa: E402
+
+usernames = count()
+
+@pytest.fixture
+def app_module():
+    return snake
+
+@pytest.fixture
+def client():
+    return snake.app.test_client()
+
+@pytest.fixture
+def new_user(client):
+    # Registers and logs in a fresh player; returns its username
+    def register(password='correct-horse'):
+        name = f'player{next(usernames)}'
+        client.post('/register', data={'username': name, 'email': f'{name}@example.com',
+                                       'password': password, 'confirm_password': password})
+        client.post('/login', data={'username': name, 'password': password})
+        return name
+    return register
+
+@pytest.fixture
+def app_context():
+    with snake.app.app_context():
+        yield
+
+@pytest.fixture
+def add_players(app_context):
+    # Creates players straight in the database and returns their ids
+    def add(count):
+        users = []
+        for _ in range(count):
+            name = f'player{next(usernames)}'
+            users.append(snake.User(username=name, email=f'{name}@example.com', password_hash='unused'))
+        snake.db.session.add_all(users)
+        snake.db.session.commit()
+        return [user.id for user in users]
+    return add
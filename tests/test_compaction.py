@@ -0,0 +1,81 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+def game(user_id, score, days_ago, verified=None):
+    return {'user_id': user_id, 'score': score, 'snake_length': 3, 'foods_eaten': score, 'game_speed': 100,
+            'canvas_size': 400, 'grid_size': 20, 'verified': verified,
+            'played_at': datetime.utcnow().replace(hour=12) - timedelta(days=days_ago)}
+
+def rollups(app_module, user_id):
+    return app_module.db.session.execute(
+        app_module.db.select(app_module.ScoreRollup).where(app_module.ScoreRollup.user_id == user_id)
+    ).scalars().all()
+
+def stats(app_module, user_id):
+    app_module.db.session.expire_all()
+    row = app_module.db.session.get(app_module.UserStats, user_id)
+    return row.games_played, row.best_score, row.score_sum
+
+@pytest.fixture
+def no_sleep(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.time, 'sleep', lambda seconds: None)
+
+def test_old_scores_fold_into_daily_rollups(app_module, add_players, no_sleep):
+    user_id, = add_players(1)
+    app_module.persist_scores([game(user_id, 30, 40, True), game(user_id, 10, 40, False), game(user_id, 20, 40),
+                               game(user_id, 5, 41), game(user_id, 99, 0)])
+    before = stats(app_module, user_id)
+
+    assert app_module.compact_scores(days=30, batch_size=2) == 4
+
+    days = {rollup.day: rollup for rollup in rollups(app_module, user_id)}
+    assert len(days) == 2
+    day = days[(datetime.utcnow() - timedelta(days=40)).date()]
+    assert (day.games, day.score_sum, day.best_score, day.min_score) == (3, 60, 30, 10)
+    assert (day.verified_games, day.rejected_games) == (1, 1)
+    remaining = app_module.db.session.execute(
+        app_module.db.select(app_module.Score.score).where(app_module.Score.user_id == user_id)).scalars().all()
+    assert remaining == [99]
+    # Totals stay exact, and a rebuild counts the rollups
+    assert stats(app_module, user_id) == before == (5, 99, 164)
+    app_module.rebuild_user_stats()
+    assert stats(app_module, user_id) == before
+
+def test_leaderboards_keep_compacted_bests(app_module, add_players, no_sleep, monkeypatch):
+    first, second = add_players(2)
+    app_module.persist_scores([game(first, 400, 60), game(second, 399, 0)])
+    app_module.compact_scores(days=30)
+    monkeypatch.setattr(app_module, 'leaderboard', app_module.Leaderboard())
+    config = (20, 400, 100)
+    assert app_module.leaderboard.rank('all', config, first)[:2] == (1, 400)
+    assert app_module.leaderboard.rank('all', config, second)[:2] == (2, 399)
+
+def test_compacted_scores_are_archived(app_module, add_players, no_sleep, monkeypatch, tmp_path):
+    monkeypatch.setattr(app_module, 'SCORE_ARCHIVE_DIR', str(tmp_path))
+    user_id, = add_players(1)
+    app_module.persist_scores([game(user_id, 12, 45)])
+    app_module.compact_scores(days=30)
+    archived = [json.loads(line) for path in tmp_path.glob('scores-*.ndjson.gz') for line in gzip.open(path, 'rt')]
+    assert [(row['user_id'], row['score']) for row in archived] == [(user_id, 12)]
+
+def test_compaction_retries_only_lock_contention(app_module, add_players, no_sleep, monkeypatch):
+    compact_batch = app_module.compact_score_batch
+    failures = [OperationalError('DELETE', {}, Exception('database is locked'))]
+
+    def flaky(engine, cutoff, limit):
+        if failures:
+            raise failures.pop()
+        return compact_batch(engine, cutoff, limit)
+
+    monkeypatch.setattr(app_module, 'compact_score_batch', flaky)
+    user_id, = add_players(1)
+    app_module.persist_scores([game(user_id, 7, 50)])
+    assert app_module.compact_scores(days=30) == 1
+
+    failures.append(OperationalError('DELETE', {}, Exception('disk I/O error')))
+    with pytest.raises(OperationalError):
+        app_module.compact_scores(days=30)
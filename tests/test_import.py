@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+def record(username, score, minutes_ago, **fields):
+    played_at = datetime(2026, 1, 1, 12) - timedelta(minutes=minutes_ago)
+    return {'username': username, 'played_at': played_at.isoformat(), 'score': score, 'snake_length': score + 1,
+            'foods_eaten': score, 'game_speed': 100, 'canvas_size': 400, 'grid_size': 20, 'verified': None,
+            **fields}
+
+def stored_scores(app_module, user_id):
+    app_module.db.session.expire_all()
+    return app_module.db.session.execute(
+        app_module.db.select(app_module.Score.played_at, app_module.Score.score, app_module.Score.verified)
+        .where(app_module.Score.user_id == user_id).order_by(app_module.Score.played_at)
+    ).all()
+
+def test_import_skips_duplicates_and_reports_why(app_module, add_players):
+    user_id, = add_players(1)
+    username = app_module.db.session.get(app_module.User, user_id).username
+    records = [
+        record(username, 10, 5),
+        record(username, 10, 5),
+        record(username, 20, 1, verified=True),
+        record('nobody-here', 5, 1),
+        record(None, 5, 1),
+        record(username, 9999, 1),
+    ]
+    assert app_module.import_score_batch(records) == {
+        'inserted': 2, 'duplicate': 1, 'unknown_player': 1, 'no_username': 1, 'invalid': 1}
+    # Running the same import again inserts nothing
+    assert app_module.import_score_batch(records[:3]) == {
+        'inserted': 0, 'duplicate': 3, 'unknown_player': 0, 'no_username': 0, 'invalid': 0}
+    assert [(score, verified) for _, score, verified in stored_scores(app_module, user_id)] == [(10, None), (20, True)]
+    stats = app_module.db.session.get(app_module.UserStats, user_id)
+    assert (stats.games_played, stats.best_score) == (2, 20)
+
+def test_exports_import_back_once(app_module, add_players, tmp_path):
+    user_id, = add_players(1)
+    username = app_module.db.session.get(app_module.User, user_id).username
+    app_module.import_score_batch([record(username, 3, 30, verified=False), record(username, 4, 20),
+                                   record(username, 5, 10, verified=True)])
+    before = stored_scores(app_module, user_id)
+    runner = app_module.app.test_cli_runner()
+    for fmt in ('ndjson', 'csv'):
+        path = tmp_path / f'scores.{fmt}'
+        result = runner.invoke(args=['export-scores', '--format', fmt, '--user', username, '--output', str(path)])
+        assert result.exit_code == 0, result.output
+        result = runner.invoke(args=['import-scores', str(path)])
+        assert result.exit_code == 0, result.output
+        assert 'Imported 0 of 3 scores (skipped 3 already present)' in result.output
+    with app_module.db.engine.begin() as conn:
+        conn.execute(app_module.db.delete(app_module.Score).where(app_module.Score.user_id == user_id))
+    result = runner.invoke(args=['import-scores', str(tmp_path / 'scores.csv')])
+    assert 'Imported 3 of 3 scores' in result.output
+    assert stored_scores(app_module, user_id) == before
@@ -0,0 +1,71 @@
+from datetime import datetime
+from itertools import count
+
+import pytest
+
+# Every test plays its own game settings, so its boards only hold its own players
+canvas_sizes = count(500)
+
+@pytest.fixture
+def config():
+    return (10, next(canvas_sizes), 100)
+
+@pytest.fixture
+def board(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'leaderboard', app_module.Leaderboard())
+    return app_module.leaderboard
+
+def play(app_module, config, results):
+    grid_size, canvas_size, game_speed = config
+    app_module.persist_scores([
+        {'user_id': user_id, 'score': score, 'snake_length': 3, 'foods_eaten': score, 'game_speed': game_speed,
+         'canvas_size': canvas_size, 'grid_size': grid_size, 'played_at': datetime.utcnow()}
+        for user_id, score in results
+    ])
+
+def board_query(config):
+    return f'grid_size={config[0]}&canvas_size={config[1]}&game_speed={config[2]}'
+
+def test_equal_scores_share_a_rank(app_module, add_players, board, config):
+    first, second, third = add_players(3)
+    play(app_module, config, [(first, 50), (second, 80), (third, 50), (first, 20)])
+    page, total = board.page('all', config, None, 10)
+    assert page == [(1, second, 80), (2, first, 50), (2, third, 50)]
+    assert total == 3
+    assert board.rank('all', config, third) == (2, 50, 3)
+
+def test_new_scores_are_picked_up_after_load(app_module, add_players, board, config):
+    first, second = add_players(2)
+    play(app_module, config, [(first, 10), (second, 20)])
+    assert board.rank('all', config, first)[0] == 2
+    play(app_module, config, [(first, 30)])
+    assert board.rank('all', config, first) == (1, 30, 2)
+
+@pytest.mark.parametrize('players', [4, 5])
+def test_cursor_pages_end_without_a_dangling_cursor(app_module, add_players, board, client, config, players):
+    user_ids = add_players(players)
+    play(app_module, config, [(user_id, 10 * (index + 1)) for index, user_id in enumerate(user_ids)])
+    seen, cursor = [], None
+    while True:
+        query = board_query(config) + '&limit=2' + (f'&after={cursor}' if cursor else '')
+        body = client.get(f'/api/leaderboard?{query}').get_json()
+        assert body['entries'] and body['total'] == players
+        seen += [entry['user_id'] for entry in body['entries']]
+        cursor = body['next']
+        if cursor is None:
+            break
+    assert seen == user_ids[::-1]
+
+def test_players_below_the_cutoff_are_ranked_from_the_database(app_module, add_players, board, config,
+                                                               monkeypatch):
+    monkeypatch.setattr(app_module, 'LEADERBOARD_SIZE', 3)
+    user_ids = add_players(6)
+    play(app_module, config, [(user_id, 10 * (index + 1)) for index, user_id in enumerate(user_ids)])
+    page, total = board.page('all', config, None, 10)
+    assert [user_id for _, user_id, _ in page] == user_ids[:2:-1]
+    assert total == 6
+    assert board.rank('all', config, user_ids[0]) == (6, 10, 6)
+    # An evicted player comes back with a new personal best
+    play(app_module, config, [(user_ids[1], 55)])
+    assert board.rank('all', config, user_ids[1]) == (2, 55, 6)
+    assert len(board.rankings[('all', config)].keys) == 3
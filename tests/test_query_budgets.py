@@ -0,0 +1,48 @@
+import pytest
+
+SCORE = {'score': 40, 'snake_length': 7, 'foods_eaten': 4, 'game_speed': 100, 'canvas_size': 400, 'grid_size': 20}
+
+def statement_count(response):
+    timing = response.headers['Server-Timing']
+    return int(timing.split('desc="', 1)[1].split(' ', 1)[0])
+
+@pytest.fixture
+def cold_worker(app_module, monkeypatch):
+    # QUERY_BUDGETS are set for a worker whose caches are still empty
+    monkeypatch.setattr(app_module, 'QUERY_BUDGET_MODE', 'strict')
+    monkeypatch.setattr(app_module, 'SERVER_TIMING', True)
+    monkeypatch.setattr(app_module, 'identity_cache',
+                        app_module.IdentityCache(app_module.USER_CACHE_SIZE, app_module.USER_CACHE_TTL))
+    monkeypatch.setattr(app_module, 'leaderboard', app_module.Leaderboard())
+    monkeypatch.setattr(app_module, 'score_analytics',
+                        app_module.ScoreAnalyticsCache(app_module.ANALYTICS_CACHE_USERS))
+
+def test_main_pages_stay_within_query_budgets(app_module, client, cold_worker):
+    password = 'budget-check'
+    steps = [
+        ('GET', '/', None),
+        ('POST', '/register', {'data': {'username': 'budget', 'email': 'budget@example.com',
+                                        'password': password, 'confirm_password': password}}),
+        ('POST', '/login', {'data': {'username': 'budget', 'password': password}}),
+        ('POST', '/api/save_score', {'json': SCORE}),
+        ('GET', '/dashboard', None),
+        ('GET', '/api/scores', None),
+        ('GET', '/api/stats', None),
+        ('GET', '/api/analytics', None),
+        ('GET', '/api/leaderboard', None),
+        ('GET', '/api/leaderboard/me', None),
+        ('GET', '/logout', None),
+    ]
+    for method, path, kwargs in steps:
+        response = client.open(path, method=method, **(kwargs or {}))
+        assert response.status_code < 400, (path, response.get_data(as_text=True))
+        endpoint = app_module.app.url_map.bind('').match(path, method=method)[0]
+        assert statement_count(response) <= app_module.QUERY_BUDGETS[endpoint], path
+        if path == '/api/leaderboard/me':
+            assert response.get_json()['rank'] is not None
+
+def test_strict_mode_rejects_requests_over_budget(app_module, client, cold_worker, monkeypatch):
+    monkeypatch.setitem(app_module.QUERY_BUDGETS, 'score_stats', 0)
+    response = client.get('/api/stats')
+    assert response.status_code == 500
+    assert 'budget is 0' in response.get_data(as_text=True)
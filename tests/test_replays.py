@@ -0,0 +1,72 @@
+import base64
+import time
+
+import pytest
+
+import simulator
+
+# Starting from the middle of a 20x20 board, turn right and hit the wall:
+# nine moves, no food on the way with this seed
+WALL_RUN = {'score': 0, 'snake_length': 1, 'foods_eaten': 0, 'game_speed': 125, 'canvas_size': 400, 'grid_size': 20}
+
+def encode_replay(seed, events, auto_speed=True):
+    data = bytearray([simulator.REPLAY_VERSION, int(auto_speed)]) + seed.to_bytes(4, 'little')
+    previous = 0
+    for tick, kind in events:
+        value, previous = (tick - previous) << 3 | kind, tick
+        while value > 0x7F:
+            data.append(value & 0x7F | 0x80)
+            value >>= 7
+        data.append(value)
+    return bytes(data)
+
+def wall_run(end_tick=9):
+    return encode_replay(1, [(0, 0), (end_tick, simulator.REPLAY_END)])
+
+def stored_verdict(app_module, username, timeout=30):
+    # Verification finishes after the response; wait for the verifier pool
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with app_module.app.app_context():
+            verified = app_module.db.session.execute(
+                app_module.db.select(app_module.Score.verified)
+                .join(app_module.User, app_module.User.id == app_module.Score.user_id)
+                .where(app_module.User.username == username)
+            ).scalar_one()
+        if verified is not None:
+            return verified
+        time.sleep(0.05)
+    return None
+
+def test_verify_replays_checks_every_claim():
+    claims = dict(WALL_RUN)
+    jobs = [(1, wall_run(), claims), (2, wall_run(), {**claims, 'score': 1}),
+            (3, wall_run(end_tick=12), claims), (4, b'\x09garbage', claims)]
+    assert simulator.verify_replays(jobs) == [(1, True), (2, False), (3, False), (4, False)]
+
+@pytest.mark.parametrize('claims, verified', [(WALL_RUN, True), ({**WALL_RUN, 'foods_eaten': 1}, False)])
+def test_saved_replays_are_verified_in_the_background(app_module, client, new_user, claims, verified):
+    username = new_user()
+    response = client.post('/api/save_score', json={**claims, 'replay': base64.b64encode(wall_run()).decode()})
+    assert response.status_code == 200
+    assert stored_verdict(app_module, username) is verified
+
+def test_replays_beyond_the_pending_limit_wait_for_the_cli(app_module, client, new_user, monkeypatch):
+    monkeypatch.setattr(app_module.replay_verifier, 'max_pending', 0)
+    username = new_user()
+    client.post('/api/save_score', json={**WALL_RUN, 'replay': base64.b64encode(wall_run()).decode()})
+    assert stored_verdict(app_module, username, timeout=0.2) is None
+    result = app_module.app.test_cli_runner().invoke(args=['verify-replays'])
+    assert result.exit_code == 0, result.output
+    assert stored_verdict(app_module, username) is True
+
+def test_impossible_scores_are_rejected(client, new_user):
+    new_user()
+    response = client.post('/api/save_score', json={**WALL_RUN, 'score': 401})
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Invalid score'
+
+def test_oversized_replays_are_rejected(app_module, client, new_user):
+    new_user()
+    replay = base64.b64encode(b'\x01' * (app_module.REPLAY_MAX_BYTES + 1)).decode()
+    assert client.post('/api/save_score', json={**WALL_RUN, 'replay': replay}).status_code == 413
@@ -0,0 +1,58 @@
+import zlib
+from datetime import datetime
+
+import pytest
+from sqlalchemy import inspect, text
+
+@pytest.fixture
+def shards(app_module, app_context, monkeypatch, tmp_path):
+    # Three fresh shard files next to the shared main database
+    monkeypatch.setattr(app_module, 'SCORE_SHARDS', 3)
+    monkeypatch.setenv('SCORE_SHARD_URL', f'sqlite:///{tmp_path}/scores_{{shard}}.db')
+    monkeypatch.setitem(app_module.storage, 'shard_engines', None)
+    monkeypatch.setattr(app_module, 'leaderboard', app_module.Leaderboard())
+    app_module.upgrade_schema()
+    yield app_module.get_shard_engines()
+    for engine in app_module.storage['shard_engines']:
+        engine.dispose()
+
+def game(user_id, score):
+    return {'user_id': user_id, 'score': score, 'snake_length': 3, 'foods_eaten': score, 'game_speed': 100,
+            'canvas_size': 400, 'grid_size': 20, 'played_at': datetime.utcnow()}
+
+def test_shard_index_is_crc32_of_the_user_id(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'SCORE_SHARDS', 3)
+    for user_id in (1, 42, 1000003):
+        assert app_module.shard_index(user_id) == zlib.crc32(str(user_id).encode()) % 3
+
+def test_shards_are_migrated_without_the_user_table(app_module, shards):
+    latest = app_module.SCHEMA_MIGRATIONS[-1][0]
+    for engine in shards:
+        assert app_module.current_schema_version(engine) == latest
+        tables = set(inspect(engine).get_table_names())
+        assert {'score', 'user_stats', 'score_replay', 'score_rollup'} <= tables
+        assert 'user' not in tables
+
+def test_scores_land_on_their_players_shard(app_module, add_players, shards):
+    user_ids = add_players(12)
+    app_module.persist_scores([game(user_id, 10) for user_id in user_ids])
+    for index, engine in enumerate(shards):
+        with engine.connect() as conn:
+            stored = set(conn.execute(text('SELECT user_id FROM score')).scalars())
+        assert stored == {user_id for user_id in user_ids if app_module.shard_index(user_id) == index}
+
+def test_fan_out_returns_results_in_shard_order(app_module, add_players, shards):
+    user_ids = add_players(12)
+    app_module.persist_scores([game(user_id, user_id) for user_id in user_ids])
+    counts = app_module.fan_out(
+        lambda index, conn: (index, conn.execute(text('SELECT count(*) FROM score')).scalar()))
+    assert [index for index, _ in counts] == [0, 1, 2]
+    assert sum(count for _, count in counts) == 12
+    assert app_module.global_score_stats() == {'players': 12, 'games': 12, 'best_score': max(user_ids)}
+
+def test_leaderboard_merges_every_shard(app_module, add_players, shards):
+    user_ids = add_players(6)
+    app_module.persist_scores([game(user_id, 10 * (index + 1)) for index, user_id in enumerate(user_ids)])
+    page, total = app_module.leaderboard.page('all', None, None, 10)
+    assert [user_id for _, user_id, _ in page] == user_ids[::-1]
+    assert total == 6